@@ -21,6 +21,7 @@ from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
 from enum import Enum
 import sys
+import signal
 import numpy as np
 import asyncio
 
@@ -29,7 +30,7 @@ try:
     from improved_face_recognition import ImprovedFaceRecognition, FaceDetectionResult
     from enhanced_components import (
         Colors, EnhancedBuzzerManager, EnhancedNumpadDialog, 
-        EnhancedMessageBox, AdminDataManager, ImprovedAdminGUI
+        EnhancedMessageBox, AdminDataManager, ImprovedAdminGUI, get_font
     )
     from discord_integration import DiscordSecurityBot
 except ImportError as e:
@@ -298,7 +299,7 @@ class VietnameseSecurityGUI:
         header_left.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         tk.Label(header_left, text="CAMERA NHẬN DIỆN",
-                font=('Arial', 24, 'bold'), fg='white', bg=Colors.PRIMARY,
+                font=get_font('Arial', 24, 'bold'), fg='white', bg=Colors.PRIMARY,
                 anchor='w').pack(side=tk.LEFT, padx=20, expand=True, fill=tk.X)
         
         # Right side - Stats + Speaker status
@@ -306,16 +307,16 @@ class VietnameseSecurityGUI:
         stats_frame.pack(side=tk.RIGHT, padx=20)
         
         self.fps_label = tk.Label(stats_frame, text="FPS: --", 
-                                 font=('Arial', 14, 'bold'), fg='white', bg=Colors.PRIMARY)
+                                 font=get_font('Arial', 14, 'bold'), fg='white', bg=Colors.PRIMARY)
         self.fps_label.pack()
         
         self.detection_count_label = tk.Label(stats_frame, text="Nhận diện: 0", 
-                                            font=('Arial', 12), fg='white', bg=Colors.PRIMARY)
+                                            font=get_font('Arial', 12), fg='white', bg=Colors.PRIMARY)
         self.detection_count_label.pack()
         
         # THÊM SPEAKER STATUS DISPLAY
         self.speaker_status_label = tk.Label(stats_frame, text="🔊 Loa: --", 
-                                           font=('Arial', 12, 'bold'), fg='yellow', bg=Colors.PRIMARY)
+                                           font=get_font('Arial', 12, 'bold'), fg='yellow', bg=Colors.PRIMARY)
         self.speaker_status_label.pack()
         
         # GIỮ NGUYÊN CAMERA FRAME
@@ -324,7 +325,7 @@ class VietnameseSecurityGUI:
         
         self.camera_label = tk.Label(self.camera_frame, 
                                    text="Đang khởi động camera + loa...\n\nVui lòng chờ...",
-                                   font=('Arial', 22), fg='white', bg='black')
+                                   font=get_font('Arial', 22), fg='white', bg='black')
         self.camera_label.pack(expand=True)
         
         # GIỮ NGUYÊN STATUS FRAME
@@ -333,12 +334,12 @@ class VietnameseSecurityGUI:
         status_frame.pack_propagate(False)
         
         self.face_status = tk.Label(status_frame, text="Hệ thống sẵn sàng",
-                                   font=('Arial', 16, 'bold'), 
+                                   font=get_font('Arial', 16, 'bold'), 
                                    fg=Colors.PRIMARY, bg=Colors.CARD_BG)
         self.face_status.pack(expand=True)
         
         self.detection_info = tk.Label(status_frame, text="Chuẩn bị nhận diện",
-                                      font=('Arial', 14), 
+                                      font=get_font('Arial', 14), 
                                       fg=Colors.TEXT_SECONDARY, bg=Colors.CARD_BG)
         self.detection_info.pack()
     
@@ -353,10 +354,10 @@ class VietnameseSecurityGUI:
         header.pack_propagate(False)
         
         tk.Label(header, text="TRẠNG THÁI XÁC THỰC",
-                font=('Arial', 20, 'bold'), fg='white', bg=Colors.SUCCESS).pack(pady=(15, 5))
+                font=get_font('Arial', 20, 'bold'), fg='white', bg=Colors.SUCCESS).pack(pady=(15, 5))
         
         self.auth_mode_label = tk.Label(header, text="CHẾ ĐỘ: ĐANG TẢI",
-                font=('Arial', 12, 'bold'), fg='white', bg=Colors.WARNING,
+                font=get_font('Arial', 12, 'bold'), fg='white', bg=Colors.WARNING,
                 relief=tk.RAISED, bd=2, padx=8, pady=1)
         self.auth_mode_label.pack(pady=(0, 10))
         
@@ -365,7 +366,7 @@ class VietnameseSecurityGUI:
         self.step_frame.pack(fill=tk.X, padx=25, pady=20)
         
         self.step_number = tk.Label(self.step_frame, text="1", 
-                                   font=('Arial', 48, 'bold'),
+                                   font=get_font('Arial', 48, 'bold'),
                                    fg='white', bg=Colors.PRIMARY,
                                    width=2, relief=tk.RAISED, bd=5)
         self.step_number.pack(side=tk.LEFT, padx=(0,20))
@@ -374,13 +375,13 @@ class VietnameseSecurityGUI:
         step_info.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         self.step_title = tk.Label(step_info, text="NHẬN DIỆN KHUÔN MẶT",
-                                  font=('Arial', 26, 'bold'),
+                                  font=get_font('Arial', 26, 'bold'),
                                   fg=Colors.TEXT_PRIMARY, bg=Colors.CARD_BG,
                                   anchor='w')
         self.step_title.pack(fill=tk.X)
         
         self.step_subtitle = tk.Label(step_info, text="Hệ thống đang phân tích",
-                                     font=('Arial', 16),
+                                     font=get_font('Arial', 16),
                                      fg=Colors.TEXT_SECONDARY, bg=Colors.CARD_BG,
                                      anchor='w')
         self.step_subtitle.pack(fill=tk.X)
@@ -390,7 +391,7 @@ class VietnameseSecurityGUI:
         progress_frame.pack(fill=tk.X, padx=25, pady=15)
         
         tk.Label(progress_frame, text="CÁC BƯỚC XÁC THỰC:",
-                font=('Arial', 18, 'bold'),
+                font=get_font('Arial', 18, 'bold'),
                 fg=Colors.TEXT_PRIMARY, bg=Colors.CARD_BG).pack(anchor='w')
         
         steps_frame = tk.Frame(progress_frame, bg=Colors.CARD_BG)
@@ -409,13 +410,13 @@ class VietnameseSecurityGUI:
             container.pack(fill=tk.X, pady=6)
             
             circle = tk.Label(container, text=f"{i+1}",
-                             font=('Arial', 18, 'bold'),
+                             font=get_font('Arial', 18, 'bold'),
                              fg='white', bg=Colors.TEXT_SECONDARY,
                              width=2, relief=tk.RAISED, bd=3)
             circle.pack(side=tk.LEFT, padx=(0,15))
             
             label = tk.Label(container, text=name,
-                            font=('Arial', 16, 'bold'),
+                            font=get_font('Arial', 16, 'bold'),
                             fg=Colors.TEXT_PRIMARY, bg=Colors.CARD_BG,
                             anchor='w')
             label.pack(side=tk.LEFT, fill=tk.X, expand=True)
@@ -430,18 +431,18 @@ class VietnameseSecurityGUI:
         msg_frame.pack(fill=tk.X, padx=25, pady=15)
         
         tk.Label(msg_frame, text="THÔNG TIN CHI TIẾT:",
-                font=('Arial', 16, 'bold'),
+                font=get_font('Arial', 16, 'bold'),
                 fg=Colors.TEXT_PRIMARY, bg=Colors.BACKGROUND).pack(anchor='w', padx=15, pady=(12,6))
         
         self.detail_message = tk.Label(msg_frame, text="Khởi động hệ thống nhận diện",
-                                      font=('Arial', 14),
+                                      font=get_font('Arial', 14),
                                       fg=Colors.TEXT_SECONDARY, bg=Colors.BACKGROUND,
                                       wraplength=420, justify=tk.LEFT, anchor='w')
         self.detail_message.pack(fill=tk.X, padx=15, pady=(0,12))
         
         # GIỮ NGUYÊN TIME LABEL
         self.time_label = tk.Label(status_panel, text="",
-                                  font=('Arial', 14),
+                                  font=get_font('Arial', 14),
                                   fg=Colors.TEXT_SECONDARY, bg=Colors.CARD_BG)
         self.time_label.pack(side=tk.BOTTOM, pady=8)
         
@@ -455,7 +456,7 @@ class VietnameseSecurityGUI:
         
         self.main_status = tk.Label(status_bar, 
                                    text="HỆ THỐNG KHÓA CỬA THÔNG MINH KHỞI ĐỘNG",
-                                   font=('Arial', 20, 'bold'),
+                                   font=get_font('Arial', 20, 'bold'),
                                    fg='white', bg=Colors.PRIMARY)
         self.main_status.pack(expand=True)
     
@@ -1090,8 +1091,7 @@ class VietnameseSecuritySystem:
                         return
                     
                     # Check if valid card
-                    valid_uids = self.admin_data.get_rfid_uids()
-                    if uid_list in valid_uids:
+                    if self.admin_data.has_rfid(uid_list):
                         # SUCCESS + VOICE
                         logger.info(f" Any mode RFID success: {uid_list}")
                         
@@ -1538,8 +1538,7 @@ class VietnameseSecuritySystem:
                         return
                     
                     # Check regular cards
-                    valid_uids = self.admin_data.get_rfid_uids()
-                    if uid_list in valid_uids:
+                    if self.admin_data.has_rfid(uid_list):
                         # SUCCESS + VOICE
                         logger.info(f"  Sequential RFID verified: {uid_list}")
                         
@@ -2120,15 +2119,15 @@ class VietnameseSecuritySystem:
             face_info = self.face_recognizer.get_database_info()
             speaker_info = "Google TTS Vietnamese" if (self.speaker and self.speaker.enabled) else "Buzzer Only"
             
-            self.gui.update_detail(f"Trạng thái hệ thống v2.4.0 + Voice:\n  Khuôn mặt đã đăng ký: {face_info['total_people']}\n  Vân tay: {len(self.admin_data.get_fingerprint_ids())}\n📱 Thẻ từ: {len(self.admin_data.get_rfid_uids())}\n  Chế độ: {mode_display}\n🔊 Audio: {speaker_info}\n🎯 Phiên bản: v2.4.0", Colors.PRIMARY)
+            self.gui.update_detail(f"Trạng thái hệ thống v2.4.0 + Voice:\n  Khuôn mặt đã đăng ký: {face_info['total_people']}\n  Vân tay: {self.admin_data.fp_count}\n📱 Thẻ từ: {self.admin_data.rfid_count}\n  Chế độ: {mode_display}\n🔊 Audio: {speaker_info}\n🎯 Phiên bản: v2.4.0", Colors.PRIMARY)
             
             # Enhanced Discord startup notification với voice info
             if self.discord_bot:
                 startup_msg = f"🚀 **HỆ THỐNG KHÓA CỬA v2.4.0 + VIETNAMESE SPEAKER ĐÃ KHỞI ĐỘNG**\n"
                 startup_msg += f"  **Chế độ xác thực**: {mode_display}\n"
                 startup_msg += f"  **Khuôn mặt**: {face_info['total_people']} người\n"
-                startup_msg += f"  **Vân tay**: {len(self.admin_data.get_fingerprint_ids())} mẫu\n"
-                startup_msg += f"📱 **Thẻ từ**: {len(self.admin_data.get_rfid_uids())} thẻ\n"
+                startup_msg += f"  **Vân tay**: {self.admin_data.fp_count} mẫu\n"
+                startup_msg += f"📱 **Thẻ từ**: {self.admin_data.rfid_count} thẻ\n"
                 startup_msg += f"🔊 **Vietnamese Speaker**: {'  Active (Google TTS)' if (self.speaker and self.speaker.enabled) else '❌ Disabled'}\n"
                 startup_msg += f"🕐 **Thời gian**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
                 startup_msg += f"🛡️ **Trạng thái**: Sẵn sàng hoạt động với voice guidance\n"
@@ -2150,6 +2149,7 @@ class VietnameseSecuritySystem:
             
             # Setup cleanup
             self.root.protocol("WM_DELETE_WINDOW", self.cleanup)
+            self._install_sigterm_handler()
             
             # Enhanced log
             logger.info(f"  Main loop starting - Mode: {current_mode} + Voice: {'Active' if (self.speaker and self.speaker.enabled) else 'Inactive'}")
@@ -2162,6 +2162,21 @@ class VietnameseSecuritySystem:
         finally:
             self.cleanup()
     
+    def _install_sigterm_handler(self):
+        """SIGTERM (systemd) -> thoát mainloop, cleanup trong finally của run() dừng bot và chờ"""
+        if not hasattr(signal, 'SIGTERM'):
+            return
+        
+        def on_sigterm(signum, frame):
+            logger.info("🛑 SIGTERM received - shutting down")
+            self.running = False
+            self.root.quit()
+        
+        try:
+            signal.signal(signal.SIGTERM, on_sigterm)
+        except (ValueError, OSError) as e:
+            logger.warning(f"Không đăng ký được SIGTERM handler: {e}")
+    
     def cleanup(self):
         """Enhanced cleanup với Vietnamese Speaker support"""
         logger.info("🧹 Đang dọn dẹp tài nguyên hệ thống v2.4.0 + Speaker...")
@@ -2211,6 +2226,11 @@ class VietnameseSecuritySystem:
                 except Exception as e:
                     logger.error(f"Lỗi cleanup speaker: {e}")
             
+            # Ghi các thay đổi admin data còn chờ (debounce)
+            if hasattr(self, 'admin_data') and self.admin_data:
+                if not self.admin_data.close():
+                    logger.error("❌ Admin data chưa được lưu khi tắt hệ thống")
+            
             if hasattr(self, 'picam2'):
                 self.picam2.stop()
                 logger.info("Camera đã dừng")
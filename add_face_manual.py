@@ -123,7 +123,7 @@ def add_face_manual():
                 info = face_recognizer.get_database_info()
                 print(f"\n📊 THỐNG KÊ DATABASE:")
                 print(f"   👥 Tổng số người: {info['total_people']}")
-                print(f"   📸 Tổng ảnh: {sum(p['face_count'] for p in info['people'].values())}")
+                print(f"   📸 Tổng ảnh: {face_recognizer.total_images}")
                 return True
             else:
                 print("❌ Lỗi lưu dữ liệu training!")
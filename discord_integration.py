@@ -5,123 +5,438 @@ Version: 2.2 - 2025-06-14
 """
 
 import discord
+from discord import Embed
 from discord.ext import commands
 import os
 from dotenv import load_dotenv
 import asyncio
 import threading
+import time
 from datetime import datetime
 import logging
+import functools
+import hmac
+from enum import Enum, IntEnum
 from typing import Optional
-import concurrent.futures
 
-# Load environment
-load_dotenv()
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
-TOKEN = os.getenv('DISCORD_TOKEN')
-CHANNEL_ID = int(os.getenv('DISCORD_CHANNEL_ID'))
-ADMIN_USER_IDS = [int(id.strip()) for id in os.getenv('ADMIN_USER_IDS', '').split(',') if id.strip()]
-BOT_PASSWORD = os.getenv('BOT_PASSWORD')
+# uvloop (chỉ có trên POSIX) - fallback về asyncio mặc định nếu không có
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+@functools.cache
+def _load_env():
+    """Load .env một lần (lần đầu khởi tạo bot), trả về cấu hình đã parse:
+    (token, channel_id, admin_user_ids, bot_password, guild_id)
+    """
+    load_dotenv()
+    
+    token = os.getenv('DISCORD_TOKEN')
+    channel_id = int(os.getenv('DISCORD_CHANNEL_ID'))
+    # int() tự bỏ khoảng trắng nên chỉ cần strip để lọc phần tử rỗng
+    admin_user_ids = frozenset(int(x) for x in os.getenv('ADMIN_USER_IDS', '').split(',') if x.strip())
+    bot_password = os.getenv('BOT_PASSWORD')
+    guild_id = int(os.getenv('DISCORD_GUILD_ID')) if os.getenv('DISCORD_GUILD_ID') else None
+    return token, channel_id, admin_user_ids, bot_password, guild_id
 
 logger = logging.getLogger(__name__)
 
+# Phiên đăng nhập Discord hết hạn sau 8 giờ, dọn dẹp mỗi 5 phút
+_AUTH_SESSION_TTL = 8 * 3600
+_AUTH_PRUNE_INTERVAL = 300
+
+# TTL cache cho trạng thái hệ thống (database cache theo key đếm/version, không cần TTL)
+_STATUS_CACHE_TTL = 2.0
+
+# Mức độ cảnh báo (thấp -> cao), dùng làm index cho bảng màu/icon
+class Sev(IntEnum):
+    SUCCESS = 0
+    INFO = 1
+    WARNING = 2
+    DANGER = 3
+    CRITICAL = 4
+
+_SEV_COLORS = (
+    0x00ff00,   # Xanh lá - Thành công
+    0x0099ff,   # Xanh dương - Thông tin
+    0xffa500,   # Cam - Cảnh báo
+    0xff0000,   # Đỏ - Nguy hiểm
+    0x8b0000    # Đỏ đậm - Nghiêm trọng
+)
+_SEV_ICONS = ("✅", "ℹ️", "⚠️", "🚨", "🔴")
+_SEV_FROM_STR = {sev.name: sev for sev in Sev}
+
+def _sev(alert_type):
+    """Chuẩn hóa alert_type (chuỗi hoặc Sev) về Sev, không rõ thì INFO"""
+    if isinstance(alert_type, Sev):
+        return alert_type
+    return _SEV_FROM_STR.get(alert_type, Sev.INFO)
+
+# Định dạng thời gian dùng chung
+# Giới hạn Discord cho 1 message: tối đa 10 embed, tổng ký tự các embed <= 6000
+_EMBEDS_PER_MESSAGE = 10
+_EMBED_TOTAL_LIMIT = 6000
+# Embed gộp thông báo: <= 25 field, chừa 2 field cuối (nguồn/cần hành động) và ~200 ký tự cho title
+_BATCH_FIELDS_MAX = 25 - 2
+_BATCH_TEXT_MAX = _EMBED_TOTAL_LIMIT - 200
+
+_STRFTIME_HMS = "%H:%M:%S"
+_STRFTIME_FULL = "%Y-%m-%d %H:%M:%S"
+
+# Template field thống kê của lệnh system info (format_map với snapshot trạng thái)
+_ATTEMPT_INFO_TEMPLATE = (
+    "👤 Khuôn mặt: {face_attempts}/{face_required}\n"
+    "👆 Vân tay: {fp_attempts}/5\n"
+    "📱 Thẻ từ: {rfid_attempts}/5\n"
+    "🔑 Mật khẩu: {pin_attempts}/5"
+)
+
+# Field cố định của embed thông báo bảo mật (dùng với Embed.from_dict)
+_NOTIFICATION_SOURCE_FIELD = {"name": "📍 Nguồn", "value": "Hệ thống bảo mật", "inline": True}
+_NOTIFICATION_ACTION_FIELD = {"name": "🔔 Cần hành động", "value": "Kiểm tra hệ thống ngay!", "inline": False}
+
+# Embed từ chối khi chưa đăng nhập
+_AUTH_REQUIRED_EMBED = Embed(
+    title="🔒 YÊU CẦU XÁC THỰC",
+    description="Bạn cần đăng nhập trước!\nSử dụng: `!login khoi2025`",
+    color=0xff0000
+)
+
+# Danh sách lệnh trong !menu
+_MENU_BASIC_FIELDS = [
+    {"name": cmd, "value": desc, "inline": False} for cmd, desc in (
+        ("🔑 !login <password>", "Đăng nhập Discord bot"),
+        ("👋 !logout", "Đăng xuất"),
+        ("📊 !status", "Trạng thái hệ thống"),
+        ("🏓 !ping", "Test kết nối")
+    )
+]
+
+_MENU_AUTH_FIELDS = [
+    {"name": cmd, "value": desc, "inline": False} for cmd, desc in (
+        ("🔓 !unlock", "Mở khóa cửa từ xa"),
+        ("🚀 !start_auth", "Bắt đầu xác thực 4 lớp"),
+        ("🔍 !system_info", "Thông tin chi tiết hệ thống"),
+        ("📊 !live_info", "Thông tin real-time (auto-update)"),
+        ("⏹️ !live_stop", "Dừng cập nhật real-time")
+    )
+]
+
+# Việt hóa step names - key theo Enum.name của AuthStep: (icon, tên)
+_STEP_NAMES = {
+    'FACE': ('👤', 'Nhận diện khuôn mặt'),
+    'FINGERPRINT': ('👆', 'Vân tay'),
+    'RFID': ('📱', 'Thẻ từ'),
+    'PASSCODE': ('🔑', 'Mật khẩu')
+}
+
+def _step_key(step):
+    """AuthStep -> name, chuỗi 'face' -> 'FACE'"""
+    return step.name if isinstance(step, Enum) else str(step).upper()
+
+def _step_name(step):
+    """Tên tiếng Việt của bước xác thực (không icon)"""
+    key = _step_key(step)
+    return _STEP_NAMES[key][1] if key in _STEP_NAMES else str(step)
+
+def require_auth(method):
+    """Decorator cho các lệnh _handle_* yêu cầu đã !login"""
+    @functools.wraps(method)
+    async def wrapper(self, ctx, *args, **kwargs):
+        if not self._check_auth(ctx.author.id):
+            await self._send_auth_required(ctx)
+            return
+        return await method(self, ctx, *args, **kwargs)
+    return wrapper
+
 class DiscordSecurityBot:
     def __init__(self, security_system=None):
         """
         security_system: Reference đến VietnameseSecuritySystem
         """
         self.security_system = security_system
-        self.authenticated_users = set()
+        self.token, self.channel_id, self.admin_user_ids, self.bot_password, self.guild_id = _load_env()
+        self.authenticated_users = {}  # {user_id: expiry (time.monotonic)}
+        self._auth_prune_task = None
         self.bot_thread = None
         self.bot = None
+        # Số lần xác thực thất bại trong ngày (reset khi sang ngày mới)
         self.failed_attempts_count = 0
+        self._failed_count_date = datetime.now().date()
         self.loop = None
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        self._channel: Optional[discord.TextChannel] = None
+        self._tree_synced = False
+        # Hàng đợi alert xử lý nền (tối đa 10 embed/message) - tạo trong loop của bot
+        self._alert_queue = None
+        self._alert_worker_task = None
+        # Gom các lần thất bại trong cửa sổ 2 giây thành 1 alert
+        self._pending_failures = []
+        self._failures_lock = threading.Lock()
+        self._failure_flush_task = None
+        # Task live_info đang chạy theo từng channel
+        self._live_tasks = {}
+        # Task tự khóa lại cửa sau !unlock + thời điểm khóa (loop.time)
+        self._relock_task = None
+        self._relock_deadline = 0.0
+        # Cache CPU/RAM (ts, cpu, mem) - TTL 1 giây
+        self._sys_metrics_cache = (0.0, 0.0, 0.0)
+        # Cache snapshot trạng thái + thông tin database
+        self._status_cache = {"t": 0.0, "data": None}
+        self._db_cache = {"key": None, "data": None}
+        if psutil:
+            psutil.cpu_percent(None)  # Prime counter, lần gọi đầu luôn trả về 0
         self._setup_bot()
     
     def _setup_bot(self):
         """Thiết lập Discord bot"""
         intents = discord.Intents.default()
         intents.message_content = True
-        self.bot = commands.Bot(command_prefix='!', intents=intents, help_command=None)
+        self.bot = commands.Bot(
+            command_prefix='!',
+            intents=intents,
+            help_command=None,
+            allowed_mentions=discord.AllowedMentions.none()  # Không ping từ nội dung alert
+        )
         
         # Bot events
         @self.bot.event
         async def on_ready():
             print(f'🤖 Discord Bot connected: {self.bot.user}')
+            self._channel = self.bot.get_channel(self.channel_id)
+            if self._alert_queue is None:
+                self._alert_queue = asyncio.Queue()
+                self._auth_prune_task = asyncio.create_task(self._prune_auth_sessions())
+            # Worker chết (lỗi ngoài dự kiến) thì khởi động lại khi reconnect
+            if self._alert_worker_task is None or self._alert_worker_task.done():
+                self._alert_worker_task = asyncio.create_task(self._alert_worker())
+                self._alert_worker_task.add_done_callback(self._log_worker_exit)
+            await self._sync_slash_commands()
             await self._send_startup_message()
         
-        # Commands
-        @self.bot.command(name='login')
-        async def login(ctx, password=None):
+        @self.bot.event
+        async def on_resumed():
+            # Cache channel có thể bị làm mới sau khi reconnect
+            self._channel = self.bot.get_channel(self.channel_id)
+        
+        # Commands - hybrid: dùng được cả !lệnh lẫn /lệnh (slash không qua prefix parser)
+        @self.bot.hybrid_command(name='login', description="Đăng nhập Discord bot")
+        async def login(ctx, password: Optional[str] = None):
             await self._handle_login(ctx, password)
         
-        @self.bot.command(name='logout')  
+        @self.bot.hybrid_command(name='logout', description="Đăng xuất")
         async def logout(ctx):
             await self._handle_logout(ctx)
         
-        @self.bot.command(name='status')
+        @self.bot.hybrid_command(name='status', description="Trạng thái hệ thống")
         async def status(ctx):
             await self._handle_status(ctx)
         
-        @self.bot.command(name='unlock')
+        @self.bot.hybrid_command(name='unlock', description="Mở khóa cửa từ xa")
         async def unlock(ctx):
             await self._handle_unlock(ctx)
         
-        @self.bot.command(name='start_auth')
+        @self.bot.hybrid_command(name='start_auth', description="Bắt đầu xác thực 4 lớp")
         async def start_auth(ctx):
             await self._handle_start_auth(ctx)
         
-        @self.bot.command(name='system_info')
+        @self.bot.hybrid_command(name='system_info', description="Thông tin chi tiết hệ thống")
         async def system_info(ctx):
             await self._handle_system_info(ctx)
         
-        @self.bot.command(name='live_info')
+        @self.bot.hybrid_command(name='live_info', description="Thông tin real-time (auto-update)")
         async def live_info(ctx):
             await self._handle_live_info(ctx)
         
-        @self.bot.command(name='menu')
+        @self.bot.hybrid_command(name='live_stop', description="Dừng cập nhật real-time")
+        async def live_stop(ctx):
+            await self._handle_live_stop(ctx)
+        
+        @self.bot.hybrid_command(name='menu', description="Menu lệnh")
         async def menu(ctx):
             await self._handle_menu(ctx)
         
-        @self.bot.command(name='ping')
+        @self.bot.hybrid_command(name='ping', description="Test kết nối")
         async def ping(ctx):
-            latency = round(self.bot.latency * 1000)
-            embed = discord.Embed(title="🏓 PONG!", description=f"Latency: {latency}ms", color=0x00ff00)
+            embed = self._ping_embed_template.copy()
+            embed.description = f"Latency: {round(self.bot.latency * 1000)}ms"
             await self._safe_send(ctx.send, embed=embed)
+        
+        # Embed cố định - build 1 lần
+        self._menu_embed_anon = self._build_menu_embed(authenticated=False)
+        self._menu_embed_auth = self._build_menu_embed(authenticated=True)
+        self._startup_embed = self._build_startup_embed()
+        self._ping_embed_template = Embed(title="🏓 PONG!", color=0x00ff00)
+    
+    async def _sync_slash_commands(self):
+        """Sync slash commands 1 lần (theo guild nếu có DISCORD_GUILD_ID để cập nhật ngay)"""
+        if self._tree_synced:
+            return
+        try:
+            if self.guild_id:
+                guild = discord.Object(id=self.guild_id)
+                self.bot.tree.copy_global_to(guild=guild)
+                await self.bot.tree.sync(guild=guild)
+            else:
+                await self.bot.tree.sync()
+            self._tree_synced = True
+        except discord.HTTPException as e:
+            logger.warning(f"Slash command sync failed: {e}")
     
     async def _safe_send(self, send_func, **kwargs):
-        """ULTRA SIMPLE: Gửi message không có bất kỳ timeout nào"""
+        """ULTRA SIMPLE: Gửi message không có timeout, retry 1 lần khi bị rate limit (429)"""
+        for attempt in range(2):
+            try:
+                # Đơn giản nhất - chỉ gửi trực tiếp
+                return await send_func(**kwargs)
+            except (discord.RateLimited, discord.HTTPException) as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is None and getattr(e, 'status', None) == 429:
+                    retry_after = 1.0
+                if attempt == 0 and retry_after is not None:
+                    logger.warning(f"Discord rate limited, retry sau {retry_after:.1f}s")
+                    await asyncio.sleep(retry_after)
+                    continue
+                logger.warning(f"Discord send failed: {e}")
+                return None
+            except Exception as e:
+                # Chỉ log lỗi, không raise exception
+                logger.warning(f"Discord send failed: {e}")
+                return None
+    
+    def _get_channel(self):
+        """Lấy channel đã cache, chỉ fallback get_channel khi cache trống"""
+        self._channel = self._channel or self.bot.get_channel(self.channel_id)
+        return self._channel
+    
+    def _put_alert(self, item):
+        """Đưa alert vào hàng đợi nền - gọi được từ bất kỳ thread/loop nào"""
+        if self._alert_queue is None or not self.loop or self.loop.is_closed():
+            logger.warning("Discord alert dropped: bot chưa sẵn sàng")
+            return False
+        
+        # asyncio.Queue không thread-safe: gọi từ loop khác thì chuyển sang loop của bot
         try:
-            # Đơn giản nhất - chỉ gửi trực tiếp
-            return await send_func(**kwargs)
-        except Exception as e:
-            # Chỉ log lỗi, không raise exception
-            logger.warning(f"Discord send failed: {e}")
-            return None
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self.loop:
+            self._alert_queue.put_nowait(item)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._alert_queue.put_nowait, item)
+            except RuntimeError as e:
+                # Loop của bot đã đóng
+                logger.warning(f"Discord send failed: {e}")
+                return False
+        return True
+    
+    def _send_urgent(self, embed):
+        """Gửi ngay, bỏ qua hàng đợi (CRITICAL) - fire-and-forget trên loop của bot"""
+        if not self.loop or self.loop.is_closed():
+            return False
+        asyncio.run_coroutine_threadsafe(self._send_embeds([embed]), self.loop)
+        return True
+    
+    async def _send_embeds(self, embeds):
+        """Gửi embed theo nhóm: mỗi message <= 10 embed và <= 6000 ký tự (quá giới hạn Discord trả 400).
+        
+        Trả về True nếu mọi message đều gửi được.
+        """
+        channel = self._get_channel()
+        if not channel:
+            return False
+        
+        sent = True
+        group, size = [], 0
+        for embed in embeds:
+            embed_len = len(embed)
+            if group and (len(group) >= _EMBEDS_PER_MESSAGE or size + embed_len > _EMBED_TOTAL_LIMIT):
+                sent = await self._safe_send(channel.send, embeds=group) is not None and sent
+                group, size = [], 0
+            group.append(embed)
+            size += embed_len
+        if group:
+            sent = await self._safe_send(channel.send, embeds=group) is not None and sent
+        return sent
+    
+    async def _alert_worker(self):
+        """Consumer nền: gom alert đến trong 0.25s, dựng embed và gửi chung 1 message"""
+        while True:
+            batch = [await self._alert_queue.get()]
+            try:
+                await asyncio.sleep(0.25)
+                while len(batch) < 10 and not self._alert_queue.empty():
+                    batch.append(self._alert_queue.get_nowait())
+                await self._send_alert_batch(batch)
+            except Exception:
+                # 1 batch lỗi không được làm chết worker (hàng đợi sẽ không còn ai đọc)
+                logger.exception(f"❌ Discord alert worker error - {len(batch)} alert(s)")
+            finally:
+                # Cho _alert_queue.join() (lúc tắt) biết batch đã xử lý xong
+                for _ in batch:
+                    self._alert_queue.task_done()
+    
+    async def _send_alert_batch(self, batch):
+        """Dựng embed cho 1 batch alert và gửi"""
+        if not self._get_channel():
+            logger.warning(f"Discord channel unavailable - dropped {len(batch)} alert(s)")
+            return
+        
+        # Embed dựng sẵn (failure alert) giữ nguyên, thông báo text gộp thành 1 embed
+        embeds = [item for item in batch if isinstance(item, Embed)]
+        notifications = [item for item in batch if not isinstance(item, Embed)]
+        if len(notifications) == 1:
+            embeds.append(self._build_notification_embed(*notifications[0]))
+        elif notifications:
+            embeds.extend(self._build_batch_embeds(notifications))
+        if not await self._send_embeds(embeds):
+            logger.warning(f"❌ Discord send failed - {len(batch)} alert(s) có thể chưa được gửi")
+    
+    @staticmethod
+    def _log_worker_exit(task):
+        """Callback: log nếu alert worker dừng vì exception"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"❌ Discord alert worker stopped: {task.exception()!r}")
     
     async def _send_startup_message(self):
         """Gửi thông báo khởi động"""
-        channel = self.bot.get_channel(CHANNEL_ID)
+        channel = self._get_channel()
         if channel:
-            embed = discord.Embed(
-                title="🔐 HỆ THỐNG KHÓA CỬA THÔNG MINH",
-                description="✅ Đã kết nối với hệ thống bảo mật!",
-                color=0x00ff00,
-                timestamp=datetime.now()
-            )
-            embed.add_field(name="🤖 Bot Status", value="Online", inline=True)
-            embed.add_field(name="🔒 Security System", value="Connected", inline=True)
-            embed.add_field(name="📱 Commands", value="!menu", inline=True)
-            embed.add_field(name="🛡️ Security Alert", value="Active Monitoring", inline=True)
+            # Copy embed dựng sẵn, chỉ gắn timestamp mới
+            embed = self._startup_embed.copy()
+            embed.timestamp = discord.utils.utcnow()
             await self._safe_send(channel.send, embed=embed)
     
+    @staticmethod
+    def _build_startup_embed():
+        """Tạo embed khởi động (không timestamp)"""
+        embed = Embed(
+            title="🔐 HỆ THỐNG KHÓA CỬA THÔNG MINH",
+            description="✅ Đã kết nối với hệ thống bảo mật!",
+            color=0x00ff00
+        )
+        embed.add_field(name="🤖 Bot Status", value="Online", inline=True)
+        embed.add_field(name="🔒 Security System", value="Connected", inline=True)
+        embed.add_field(name="📱 Commands", value="!menu", inline=True)
+        embed.add_field(name="🛡️ Security Alert", value="Active Monitoring", inline=True)
+        return embed
+    
     async def _handle_login(self, ctx, password):
         """Xử lý đăng nhập"""
         user_id = ctx.author.id
         
-        if password != BOT_PASSWORD:
-            embed = discord.Embed(
+        # So sánh constant-time để không lộ thông tin qua thời gian phản hồi
+        if not self.bot_password or not hmac.compare_digest(
+            str(password or "").encode(), self.bot_password.encode()
+        ):
+            embed = Embed(
                 title="❌ XÁC THỰC THẤT BẠI",
                 description="Mật khẩu không chính xác!\nSử dụng: `!login khoi2025`",
                 color=0xff0000
@@ -129,106 +444,99 @@ class DiscordSecurityBot:
             await self._safe_send(ctx.send, embed=embed)
             return
         
-        self.authenticated_users.add(user_id)
+        self.authenticated_users[user_id] = time.monotonic() + _AUTH_SESSION_TTL
         
-        embed = discord.Embed(
+        embed = Embed(
             title="✅ XÁC THỰC THÀNH CÔNG",
             description=f"Chào mừng {ctx.author.mention}!\nBạn có thể điều khiển hệ thống bảo mật.",
             color=0x00ff00,
-            timestamp=datetime.now()
+            timestamp=discord.utils.utcnow()
         )
         embed.add_field(name="👤 User", value=ctx.author.name, inline=True)
         embed.add_field(name="🔑 Access Level", value="Authorized", inline=True)
         
-        await self._safe_send(ctx.send, embed=embed)
+        await self._safe_send(ctx.send, embed=embed, allowed_mentions=discord.AllowedMentions(users=[ctx.author]))
         await self.send_security_notification(f"🔓 User {ctx.author.name} đã đăng nhập Discord bot", "INFO")
     
     async def _handle_logout(self, ctx):
         """Xử lý đăng xuất"""
         user_id = ctx.author.id
-        self.authenticated_users.discard(user_id)
+        self.authenticated_users.pop(user_id, None)
         
-        embed = discord.Embed(
+        embed = Embed(
             title="👋 ĐĂNG XUẤT THÀNH CÔNG",
             description="Bạn đã đăng xuất khỏi hệ thống!",
             color=0xffa500
         )
         await self._safe_send(ctx.send, embed=embed)
     
+    @require_auth
     async def _handle_status(self, ctx):
         """Xử lý lệnh status"""
-        if not self._check_auth(ctx.author.id):
-            await self._send_auth_required(ctx)
-            return
-        
         # Lấy thông tin từ hệ thống chính
         system_status = "UNKNOWN"
         door_status = "UNKNOWN"
         
         if self.security_system:
-            try:
-                system_status = "READY" if self.security_system.running else "STOPPED"
-                door_status = "LOCKED" if self.security_system.relay.value else "UNLOCKED"
-            except:
-                pass
-        
-        embed = discord.Embed(
-            title="📊 TRẠNG THÁI HỆ THỐNG BẢO MẬT",
-            color=0x0099ff,
-            timestamp=datetime.now()
-        )
-        
-        embed.add_field(name="🤖 Discord Bot", value="✅ Online", inline=True)
-        embed.add_field(name="🔒 Security System", value=f"🟢 {system_status}", inline=True)
-        embed.add_field(name="🚪 Door Lock", value=f"{'🔒' if door_status == 'LOCKED' else '🔓'} {door_status}", inline=True)
+            state = await self._get_status_snapshot()
+            system_status = "READY" if state['running'] else "STOPPED"
+            if state['door_locked'] is not None:
+                door_status = "LOCKED" if state['door_locked'] else "UNLOCKED"
         
-        embed.add_field(name="👥 Discord Users", value=f"{len(self.authenticated_users)} logged in", inline=True)
-        embed.add_field(name="⚠️ Failed Attempts", value=f"{self.failed_attempts_count} today", inline=True)
-        embed.add_field(name="⏱️ Last Update", value=datetime.now().strftime("%H:%M:%S"), inline=True)
+        now = datetime.now()
+        # Chỉ đếm phiên còn hạn (prune định kỳ có thể chưa chạy)
+        mono_now = time.monotonic()
+        active_users = sum(1 for expiry in self.authenticated_users.values() if expiry > mono_now)
+        embed = Embed.from_dict({
+            "title": "📊 TRẠNG THÁI HỆ THỐNG BẢO MẬT",
+            "color": 0x0099ff,
+            "fields": [
+                {"name": "🤖 Discord Bot", "value": "✅ Online", "inline": True},
+                {"name": "🔒 Security System", "value": f"🟢 {system_status}", "inline": True},
+                {"name": "🚪 Door Lock", "value": f"{'🔒' if door_status == 'LOCKED' else '🔓'} {door_status}", "inline": True},
+                {"name": "👥 Discord Users", "value": f"{active_users} logged in", "inline": True},
+                {"name": "⚠️ Failed Attempts", "value": f"{self._failed_today()} today", "inline": True},
+                {"name": "⏱️ Last Update", "value": now.strftime(_STRFTIME_HMS), "inline": True}
+            ]
+        })
         
         await self._safe_send(ctx.send, embed=embed)
     
+    @require_auth
     async def _handle_unlock(self, ctx):
         """Xử lý lệnh mở khóa"""
-        if not self._check_auth(ctx.author.id):
-            await self._send_auth_required(ctx)
-            return
-        
-        embed = discord.Embed(
+        embed = Embed(
             title="🔓 YÊU CẦU MỞ KHÓA",
             description="Đang gửi lệnh mở khóa đến hệ thống...",
             color=0xffa500
         )
-        await self._safe_send(ctx.send, embed=embed)
+        pending_msg = await self._safe_send(ctx.send, embed=embed)
         
         # Gửi lệnh đến hệ thống chính
         if self.security_system:
             try:
-                await self._unlock_via_system(ctx)
+                await self._unlock_via_system(ctx, pending_msg)
             except Exception as e:
-                error_embed = discord.Embed(
+                error_embed = Embed(
                     title="❌ LỖI MỞ KHÓA",
                     description=f"Không thể thực hiện: {str(e)}",
                     color=0xff0000
                 )
-                await self._safe_send(ctx.send, embed=error_embed)
+                await self._reply_in_place(ctx, pending_msg, error_embed)
         else:
             # Simulation mode
             await asyncio.sleep(1)
-            success_embed = discord.Embed(
+            success_embed = Embed(
                 title="🔓 MỞ KHÓA THÀNH CÔNG",
                 description="Cửa sẽ tự động khóa sau 3 giây (SIMULATION)",
                 color=0x00ff00
             )
-            await self._safe_send(ctx.send, embed=success_embed)
+            await self._reply_in_place(ctx, pending_msg, success_embed)
     
+    @require_auth
     async def _handle_start_auth(self, ctx):
         """Khởi động quy trình xác thực"""
-        if not self._check_auth(ctx.author.id):
-            await self._send_auth_required(ctx)
-            return
-        
-        embed = discord.Embed(
+        embed = Embed(
             title="🚀 KHỞI ĐỘNG XÁC THỰC",
             description="Đang khởi động quy trình xác thực 4 lớp...",
             color=0x00ff00
@@ -240,251 +548,340 @@ class DiscordSecurityBot:
                 self.security_system.root.after(0, self.security_system.start_authentication)
                 await self.send_security_notification(f"🔄 {ctx.author.name} đã khởi động quy trình xác thực từ Discord", "INFO")
             except Exception as e:
-                error_embed = discord.Embed(
+                error_embed = Embed(
                     title="❌ LỖI KHỞI ĐỘNG",
                     description=f"Không thể khởi động: {str(e)}",
                     color=0xff0000
                 )
                 await self._safe_send(ctx.send, embed=error_embed)
     
+    @require_auth
     async def _handle_system_info(self, ctx):
         """FIXED: Thông tin chi tiết hệ thống REAL-TIME"""
-        if not self._check_auth(ctx.author.id):
-            await self._send_auth_required(ctx)
-            return
-        
-        embed = discord.Embed(
-            title="🔍 THÔNG TIN HỆ THỐNG THỜI GIAN THỰC",
-            color=0x9932cc,
-            timestamp=datetime.now()
-        )
+        now = datetime.now()
+        fields = []
         
         if self.security_system:
             try:
+                # Snapshot trạng thái + hardware/database probes chạy song song ngoài event loop
+                state, camera_status, db_info, perf_info = await asyncio.gather(
+                    self._get_status_snapshot(),
+                    asyncio.to_thread(self._probe_camera),
+                    self._get_db_info(),
+                    self._get_sys_metrics()
+                )
+                face_info, fp_count, rfid_count = db_info
+                
                 # Real-time system status
-                current_time = datetime.now().strftime("%H:%M:%S")
-                system_status = "🟢 ĐANG CHẠY" if self.security_system.running else "🔴 DỪNG"
+                current_time = now.strftime(_STRFTIME_HMS)
+                system_status = "🟢 ĐANG CHẠY" if state['running'] else "🔴 DỪNG"
                 
                 # Real-time door status
-                try:
-                    door_status = "🔒 KHÓA" if self.security_system.relay.value else "🔓 MỞ"
-                except:
+                if state['door_locked'] is None:
                     door_status = "❓ KHÔNG XÁC ĐỊNH"
+                else:
+                    door_status = "🔒 KHÓA" if state['door_locked'] else "🔓 MỞ"
                 
                 # Real-time authentication state
-                current_step = getattr(self.security_system.auth_state, 'step', 'Unknown')
-                step_names = {
-                    'face': 'Nhận diện khuôn mặt',
-                    'fingerprint': 'Vân tay',
-                    'rfid': 'Thẻ từ',
-                    'passcode': 'Mật khẩu'
-                }
-                current_step_vn = step_names.get(str(current_step).split('.')[-1].lower(), str(current_step))
-                
-                # Hardware status check
-                try:
-                    # Test camera
-                    frame = self.security_system.picam2.capture_array()
-                    camera_status = "✅ HOẠT ĐỘNG" if frame is not None else "❌ LỖI"
-                except:
-                    camera_status = "❌ KHÔNG KẾT NỐI"
-                
-                # Database info
-                face_info = self.security_system.face_recognizer.get_database_info()
-                fp_count = len(self.security_system.admin_data.get_fingerprint_ids())
-                rfid_count = len(self.security_system.admin_data.get_rfid_uids())
-                
-                # Current attempts info
-                face_attempts = getattr(self.security_system.auth_state, 'consecutive_face_ok', 0)
-                fp_attempts = getattr(self.security_system.auth_state, 'fingerprint_attempts', 0)
-                rfid_attempts = getattr(self.security_system.auth_state, 'rfid_attempts', 0)
-                pin_attempts = getattr(self.security_system.auth_state, 'pin_attempts', 0)
-                
-                # System info fields
-                embed.add_field(name="🕐 Thời gian hiện tại", value=current_time, inline=True)
-                embed.add_field(name="⚡ Trạng thái hệ thống", value=system_status, inline=True)
-                embed.add_field(name="🚪 Trạng thái cửa", value=door_status, inline=True)
-                
-                embed.add_field(name="🔄 Bước xác thực hiện tại", value=current_step_vn, inline=True)
-                embed.add_field(name="📹 Trạng thái camera", value=camera_status, inline=True)
-                embed.add_field(name="⚠️ Lỗi hôm nay", value=f"{self.failed_attempts_count} lần", inline=True)
-                
-                # Database info
-                embed.add_field(name="👤 Khuôn mặt đã đăng ký", value=f"{face_info['total_people']} người", inline=True)
-                embed.add_field(name="👆 Vân tay đã đăng ký", value=f"{fp_count} vân tay", inline=True)  
-                embed.add_field(name="📱 Thẻ từ đã đăng ký", value=f"{rfid_count} thẻ", inline=True)
+                current_step_vn = _step_name(state['step'])
                 
                 # Current session attempts
-                attempt_info = f"👤 Khuôn mặt: {face_attempts}/{self.security_system.config.FACE_REQUIRED_CONSECUTIVE}\n"
-                attempt_info += f"👆 Vân tay: {fp_attempts}/5\n"
-                attempt_info += f"📱 Thẻ từ: {rfid_attempts}/5\n" 
-                attempt_info += f"🔑 Mật khẩu: {pin_attempts}/5"
+                attempt_info = _ATTEMPT_INFO_TEMPLATE.format_map(state)
                 
-                embed.add_field(name="📊 Phiên xác thực hiện tại", value=attempt_info, inline=False)
-                
-                # Memory and performance
-                try:
-                    import psutil
-                    cpu_percent = psutil.cpu_percent()
-                    memory_percent = psutil.virtual_memory().percent
-                    
-                    perf_info = f"🖥️ CPU: {cpu_percent:.1f}%\n💾 RAM: {memory_percent:.1f}%"
-                    embed.add_field(name="⚡ Hiệu suất hệ thống", value=perf_info, inline=True)
-                except:
-                    embed.add_field(name="⚡ Hiệu suất hệ thống", value="Không có dữ liệu", inline=True)
+                fields = [
+                    # System info fields
+                    {"name": "🕐 Thời gian hiện tại", "value": current_time, "inline": True},
+                    {"name": "⚡ Trạng thái hệ thống", "value": system_status, "inline": True},
+                    {"name": "🚪 Trạng thái cửa", "value": door_status, "inline": True},
+                    {"name": "🔄 Bước xác thực hiện tại", "value": current_step_vn, "inline": True},
+                    {"name": "📹 Trạng thái camera", "value": camera_status, "inline": True},
+                    {"name": "⚠️ Lỗi hôm nay", "value": f"{self._failed_today()} lần", "inline": True},
+                    # Database info
+                    {"name": "👤 Khuôn mặt đã đăng ký", "value": f"{face_info['total_people']} người", "inline": True},
+                    {"name": "👆 Vân tay đã đăng ký", "value": f"{fp_count} vân tay", "inline": True},
+                    {"name": "📱 Thẻ từ đã đăng ký", "value": f"{rfid_count} thẻ", "inline": True},
+                    {"name": "📊 Phiên xác thực hiện tại", "value": attempt_info, "inline": False},
+                    # Memory and performance
+                    {"name": "⚡ Hiệu suất hệ thống", "value": perf_info or "Không có dữ liệu", "inline": True}
+                ]
                     
             except Exception as e:
-                embed.add_field(name="⚠️ Lỗi hệ thống", value=f"```{str(e)[:200]}```", inline=False)
+                fields = [{"name": "⚠️ Lỗi hệ thống", "value": f"```{str(e)[:200]}```", "inline": False}]
         else:
-            embed.add_field(name="⚠️ Trạng thái", value="🔶 Chế độ mô phỏng", inline=False)
+            fields = [{"name": "⚠️ Trạng thái", "value": "🔶 Chế độ mô phỏng", "inline": False}]
         
-        embed.set_footer(text=f"Cập nhật: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        embed = Embed.from_dict({
+            "title": "🔍 THÔNG TIN HỆ THỐNG THỜI GIAN THỰC",
+            "color": 0x9932cc,
+            "fields": fields,
+            "footer": {"text": f"Cập nhật: {now.strftime(_STRFTIME_FULL)}"}
+        })
         
         # Gửi với _safe_send mới
         await self._safe_send(ctx.send, embed=embed)
     
+    async def _get_status_snapshot(self):
+        """Snapshot trạng thái, cache 2 giây để poll liên tục không đọc lại phần cứng"""
+        now_t = time.monotonic()
+        if self._status_cache["data"] is None or now_t - self._status_cache["t"] > _STATUS_CACHE_TTL:
+            self._status_cache = {"t": now_t, "data": await asyncio.to_thread(self._snapshot_state)}
+        return self._status_cache["data"]
+    
+    async def _get_db_info(self):
+        """(face_info, fp_count, rfid_count), chỉ đọc lại khi số đếm / version database đổi"""
+        system = self.security_system
+        fp_count, rfid_count = system.admin_data.fp_count, system.admin_data.rfid_count
+        key = (fp_count, rfid_count, system.face_recognizer.version)
+        if key != self._db_cache["key"]:
+            face_info = await asyncio.to_thread(system.face_recognizer.get_database_info)
+            self._db_cache = {"key": key, "data": (face_info, fp_count, rfid_count)}
+        return self._db_cache["data"]
+    
+    def _snapshot_state(self) -> dict:
+        """Đọc trạng thái hệ thống một lần, trả về dict thuần"""
+        system = self.security_system
+        auth_state = getattr(system, 'auth_state', None)
+        
+        try:
+            door_locked = bool(system.relay.value)
+        except (AttributeError, RuntimeError, OSError) as e:
+            logger.debug(f"Relay probe failed: {e}")
+            door_locked = None
+        
+        try:
+            face_required = system.config.FACE_REQUIRED_CONSECUTIVE
+        except AttributeError:
+            face_required = '?'
+        
+        return {
+            'running': getattr(system, 'running', False),
+            'door_locked': door_locked,
+            'step': _step_key(getattr(auth_state, 'step', 'Unknown')),
+            'face_attempts': getattr(auth_state, 'consecutive_face_ok', 0),
+            'fp_attempts': getattr(auth_state, 'fingerprint_attempts', 0),
+            'rfid_attempts': getattr(auth_state, 'rfid_attempts', 0),
+            'pin_attempts': getattr(auth_state, 'pin_attempts', 0),
+            'face_required': face_required
+        }
+    
+    def _probe_camera(self):
+        """Test camera qua trạng thái Picamera2, chỉ capture frame khi không có thuộc tính started"""
+        try:
+            picam2 = self.security_system.picam2
+            started = getattr(picam2, 'started', None)
+            if started is not None:
+                return "✅ HOẠT ĐỘNG" if started else "❌ LỖI"
+            
+            frame = picam2.capture_array()
+            return "✅ HOẠT ĐỘNG" if frame is not None else "❌ LỖI"
+        except (AttributeError, RuntimeError, OSError) as e:
+            logger.debug(f"Camera probe failed: {e}")
+            return "❌ KHÔNG KẾT NỐI"
+    
+    @staticmethod
+    def _collect_sys_metrics():
+        """CPU/RAM qua psutil (chạy trong thread)"""
+        return psutil.cpu_percent(interval=None), psutil.virtual_memory().percent
+    
+    async def _get_sys_metrics(self):
+        """CPU/RAM dạng text, cache 1 giây dùng chung cho mọi handler"""
+        if not psutil:
+            return None
+        
+        ts, cpu_percent, memory_percent = self._sys_metrics_cache
+        if time.monotonic() - ts >= 1.0:
+            try:
+                cpu_percent, memory_percent = await asyncio.to_thread(self._collect_sys_metrics)
+            except Exception as e:
+                logger.warning(f"psutil error: {e}")
+                return None
+            self._sys_metrics_cache = (time.monotonic(), cpu_percent, memory_percent)
+        
+        return f"🖥️ CPU: {cpu_percent:.1f}%\n💾 RAM: {memory_percent:.1f}%"
+    
+    @require_auth
     async def _handle_live_info(self, ctx):
         """Live updating system info"""
-        if not self._check_auth(ctx.author.id):
-            await self._send_auth_required(ctx)
-            return
-        
         # Gửi message ban đầu
-        embed = discord.Embed(title="🔄 ĐANG TẢI THÔNG TIN THỜI GIAN THỰC...", color=0xffa500)
+        embed = Embed(title="🔄 ĐANG TẢI THÔNG TIN THỜI GIAN THỰC...", color=0xffa500)
         message = await self._safe_send(ctx.send, embed=embed)
         
         if message:
-            # Update 3 lần với interval 3 giây
-            for i in range(3):
-                await asyncio.sleep(3)
+            # Mỗi channel chỉ giữ 1 live task
+            old_task = self._live_tasks.pop(ctx.channel.id, None)
+            if old_task:
+                old_task.cancel()
+            self._live_tasks[ctx.channel.id] = asyncio.create_task(self._live_loop(ctx.channel.id, message))
+    
+    async def _live_loop(self, channel_id, message):
+        """Cập nhật message mỗi 3 giây cho tới khi bị cancel (!live_stop)"""
+        interval = 3
+        try:
+            while True:
+                await asyncio.sleep(interval)
                 
                 # Tạo embed mới với thông tin real-time
                 updated_embed = await self._create_realtime_embed()
                 
                 try:
                     await message.edit(embed=updated_embed)
-                except:
-                    # Nếu edit thất bại, gửi message mới
-                    await self._safe_send(ctx.send, embed=updated_embed)
+                    interval = 3
+                except discord.NotFound:
+                    # Message đã bị xóa
                     break
+                except discord.HTTPException as e:
+                    # Bị rate limit / lỗi tạm thời - backoff lũy thừa
+                    interval = min(interval * 2, 60)
+                    logger.warning(f"Live info edit failed, retry sau {interval}s: {e}")
+        finally:
+            if self._live_tasks.get(channel_id) is asyncio.current_task():
+                del self._live_tasks[channel_id]
+    
+    @require_auth
+    async def _handle_live_stop(self, ctx):
+        """Dừng live info trong channel hiện tại"""
+        task = self._live_tasks.pop(ctx.channel.id, None)
+        if task:
+            task.cancel()
+            embed = Embed(title="⏹️ ĐÃ DỪNG LIVE INFO", color=0xffa500)
+        else:
+            embed = Embed(title="ℹ️ KHÔNG CÓ LIVE INFO ĐANG CHẠY", color=0x0099ff)
+        await self._safe_send(ctx.send, embed=embed)
 
     async def _create_realtime_embed(self):
         """Tạo embed với thông tin real-time"""
-        embed = discord.Embed(
+        now = datetime.now()
+        embed = Embed(
             title="📊 THÔNG TIN THỜI GIAN THỰC",
-            color=0x00ff00,
-            timestamp=datetime.now()
+            color=0x00ff00
         )
         
         if self.security_system:
             # Thời gian thực
             embed.add_field(
                 name="🕐 Thời gian", 
-                value=datetime.now().strftime("%H:%M:%S"), 
+                value=now.strftime(_STRFTIME_HMS), 
                 inline=True
             )
             
+            state = await self._get_status_snapshot()
+            
             # Trạng thái cửa real-time
-            try:
-                door_status = "🔒 KHÓA" if self.security_system.relay.value else "🔓 MỞ"
-            except:
+            if state['door_locked'] is None:
                 door_status = "❓ KHÔNG RÕ"
+            else:
+                door_status = "🔒 KHÓA" if state['door_locked'] else "🔓 MỞ"
             
             embed.add_field(name="🚪 Cửa", value=door_status, inline=True)
             
             # Bước xác thực hiện tại
-            try:
-                step = str(self.security_system.auth_state['step']).split('.')[-1]
-                step_vn = {
-                    'FACE': '👤 Khuôn mặt',
-                    'FINGERPRINT': '👆 Vân tay', 
-                    'RFID': '📱 Thẻ từ',
-                    'PASSCODE': '🔑 Mật khẩu'
-                }.get(step.upper(), step)
-                
-                embed.add_field(name="🔄 Đang xác thực", value=step_vn, inline=True)
-            except:
-                embed.add_field(name="🔄 Đang xác thực", value="❓ Không rõ", inline=True)
+            step = state['step']
+            step_vn = " ".join(_STEP_NAMES[step]) if step in _STEP_NAMES else step
+            embed.add_field(name="🔄 Đang xác thực", value=step_vn, inline=True)
         
-        embed.set_footer(text="Auto-refresh mỗi 3 giây")
+        embed.set_footer(text="Auto-refresh mỗi 3 giây - !live_stop để dừng")
         return embed
     
     async def _handle_menu(self, ctx):
         """Menu lệnh"""
-        embed = discord.Embed(
-            title="📖 MENU ĐIỀU KHIỂN HỆ THỐNG BẢO MẬT",
-            description="Danh sách lệnh có sẵn:",
-            color=0x9932cc
-        )
-        
-        basic_commands = [
-            ("🔑 !login <password>", "Đăng nhập Discord bot"),
-            ("👋 !logout", "Đăng xuất"),
-            ("📊 !status", "Trạng thái hệ thống"),
-            ("🏓 !ping", "Test kết nối")
-        ]
-        
-        auth_commands = [
-            ("🔓 !unlock", "Mở khóa cửa từ xa"),
-            ("🚀 !start_auth", "Bắt đầu xác thực 4 lớp"),
-            ("🔍 !system_info", "Thông tin chi tiết hệ thống"),
-            ("📊 !live_info", "Thông tin real-time (auto-update)")
-        ]
-        
-        for cmd, desc in basic_commands:
-            embed.add_field(name=cmd, value=desc, inline=False)
-        
-        if self._check_auth(ctx.author.id):
-            embed.add_field(name="\n🔒 **LỆNH YÊU CẦU XÁC THỰC:**", value="━━━━━━━━━━━━━━━━━━", inline=False)
-            for cmd, desc in auth_commands:
-                embed.add_field(name=cmd, value=desc, inline=False)
+        embed = self._menu_embed_auth if self._check_auth(ctx.author.id) else self._menu_embed_anon
+        await self._safe_send(ctx.send, embed=embed)
+    
+    def _build_menu_embed(self, authenticated):
+        """Tạo embed menu cho user đã/chưa đăng nhập"""
+        fields = list(_MENU_BASIC_FIELDS)
+        if authenticated:
+            fields.append({"name": "\n🔒 **LỆNH YÊU CẦU XÁC THỰC:**", "value": "━━━━━━━━━━━━━━━━━━", "inline": False})
+            fields.extend(_MENU_AUTH_FIELDS)
         else:
-            embed.add_field(name="\n⚠️ **Cần đăng nhập:**", value="Sử dụng `!login khoi2025` để truy cập thêm lệnh", inline=False)
+            fields.append({"name": "\n⚠️ **Cần đăng nhập:**", "value": "Sử dụng `!login khoi2025` để truy cập thêm lệnh", "inline": False})
+        fields.append({"name": "\n🛡️ **BẢO MẬT:**", "value": "Bot sẽ thông báo mọi hoạt động bất thường", "inline": False})
         
-        embed.add_field(name="\n🛡️ **BẢO MẬT:**", value="Bot sẽ thông báo mọi hoạt động bất thường", inline=False)
-        embed.set_footer(text="Security System Discord Bot v2.2")
-        await self._safe_send(ctx.send, embed=embed)
+        return Embed.from_dict({
+            "title": "📖 MENU ĐIỀU KHIỂN HỆ THỐNG BẢO MẬT",
+            "description": "Danh sách lệnh có sẵn:",
+            "color": 0x9932cc,
+            "fields": fields,
+            "footer": {"text": "Security System Discord Bot v2.2"}
+        })
     
     def _check_auth(self, user_id):
-        """Kiểm tra xác thực"""
-        return user_id in self.authenticated_users
+        """Kiểm tra phiên đăng nhập (1 lookup dict); phiên hết hạn thì xóa luôn, không chờ lượt prune"""
+        expiry = self.authenticated_users.get(user_id)
+        if expiry is None:
+            return False
+        if expiry <= time.monotonic():
+            self.authenticated_users.pop(user_id, None)
+            return False
+        return True
+    
+    async def _prune_auth_sessions(self):
+        """Định kỳ xóa các phiên đăng nhập đã hết hạn"""
+        while True:
+            await asyncio.sleep(_AUTH_PRUNE_INTERVAL)
+            now = time.monotonic()
+            for user_id in [uid for uid, expiry in self.authenticated_users.items() if expiry <= now]:
+                del self.authenticated_users[user_id]
     
     async def _send_auth_required(self, ctx):
         """Gửi thông báo cần xác thực"""
-        embed = discord.Embed(
-            title="🔒 YÊU CẦU XÁC THỰC",
-            description="Bạn cần đăng nhập trước!\nSử dụng: `!login khoi2025`",
-            color=0xff0000
-        )
+        await self._safe_send(ctx.send, embed=_AUTH_REQUIRED_EMBED)
+    
+    async def _reply_in_place(self, ctx, msg, embed):
+        """Sửa lại message chờ nếu có (tiết kiệm 1 request), không thì gửi mới"""
+        if msg is not None and await self._safe_send(msg.edit, embed=embed) is not None:
+            return
         await self._safe_send(ctx.send, embed=embed)
     
-    async def _unlock_via_system(self, ctx):
+    async def _unlock_via_system(self, ctx, pending_msg=None):
         """Mở khóa qua hệ thống chính"""
         # Simulate unlock process
-        self.security_system.relay.off()  # Unlock
+        await self._relay('unlock')
         
-        success_embed = discord.Embed(
+        # Auto lock sau 3 giây - task độc lập, không bị hủy theo command.
+        # !unlock liên tiếp chỉ gia hạn deadline, không tạo thêm task
+        self._relock_deadline = asyncio.get_running_loop().time() + 3
+        if self._relock_task is None or self._relock_task.done():
+            self._relock_task = asyncio.create_task(self._relock_at_deadline(ctx))
+        
+        success_embed = Embed(
             title="🔓 CỬA ĐÃ MỞ",
             description="Cửa sẽ tự động khóa sau 3 giây",
             color=0x00ff00,
-            timestamp=datetime.now()
+            timestamp=discord.utils.utcnow()
         )
         success_embed.add_field(name="👤 Authorized by", value=ctx.author.name, inline=True)
         success_embed.add_field(name="📱 Via", value="Discord Remote", inline=True)
         
-        await self._safe_send(ctx.send, embed=success_embed)
+        await self._reply_in_place(ctx, pending_msg, success_embed)
         
         # Gửi thông báo bảo mật
         await self.send_security_notification(
             f"🔓 **REMOTE UNLOCK** - Cửa được mở từ xa bởi {ctx.author.name} qua Discord", 
             "SUCCESS"
         )
+    
+    async def _relay(self, state):
+        """Bật/tắt relay (GPIO sysfs, blocking) trong default executor"""
+        action = self.security_system.relay.off if state == 'unlock' else self.security_system.relay.on
+        await asyncio.get_running_loop().run_in_executor(None, action)
+    
+    async def _relock_at_deadline(self, ctx):
+        """Khóa lại cửa khi tới _relock_deadline (có thể được gia hạn)"""
+        loop = asyncio.get_running_loop()
+        try:
+            remaining = self._relock_deadline - loop.time()
+            while remaining > 0:
+                await asyncio.sleep(remaining)
+                remaining = self._relock_deadline - loop.time()
+        except asyncio.CancelledError:
+            # Bot shutdown: khóa đồng bộ ngay, không chờ executor
+            self.security_system.relay.on()  # Lock
+            raise
         
-        # Auto lock sau 3 giây
-        await asyncio.sleep(3)
-        self.security_system.relay.on()  # Lock
+        await self._relay('lock')
         
-        lock_embed = discord.Embed(
+        lock_embed = Embed(
             title="🔒 CỬA ĐÃ KHÓA LẠI",
             description="Tự động khóa",
             color=0xffa500
@@ -498,107 +895,172 @@ class DiscordSecurityBot:
         await self.send_security_notification(message, "INFO")
     
     async def send_security_notification(self, message, alert_type="INFO"):
-        """FIXED: Gửi thông báo bảo mật không có timeout errors"""
-        if not self.bot:
+        """FIXED: Gửi thông báo bảo mật - chỉ xếp hàng, worker nền sẽ gửi"""
+        self.queue_security_notification(message, alert_type)
+    
+    def queue_security_notification(self, message, alert_type="INFO"):
+        """Xếp hàng thông báo bảo mật (không chờ REST); CRITICAL gửi ngay"""
+        # Không có channel (chưa ready / mất kết nối) thì bỏ qua trước khi dựng embed
+        if not self.bot or not self._get_channel():
+            return False
+        
+        sev = _sev(alert_type)
+        now = datetime.now()
+        if sev is Sev.CRITICAL:
+            return self._send_urgent(self._build_notification_embed(message, sev, now))
+        return self._put_alert((message, sev, now))
+    
+    @classmethod
+    def _build_batch_embeds(cls, notifications):
+        """Gộp nhiều thông báo thành embed, tách embed mới trước khi vượt giới hạn 6000 ký tự / 25 field"""
+        embeds = []
+        fields, size = [], 0
+        for message, msg_sev, msg_time in notifications:
+            name = f"{_SEV_ICONS[msg_sev]} {msg_time.strftime(_STRFTIME_HMS)} - {msg_sev.name}"
+            value = message[:1024]
+            if fields and (len(fields) >= _BATCH_FIELDS_MAX or size + len(name) + len(value) > _BATCH_TEXT_MAX):
+                embeds.append(cls._build_batch_embed(fields))
+                fields, size = [], 0
+            fields.append((msg_sev, name, value))
+            size += len(name) + len(value)
+        embeds.append(cls._build_batch_embed(fields))
+        return embeds
+    
+    @staticmethod
+    def _build_batch_embed(fields):
+        """Dựng 1 embed từ các field (sev, name, value), màu/icon theo mức độ cao nhất"""
+        sev = max(f[0] for f in fields)
+        embed = Embed(
+            title=f"{_SEV_ICONS[sev]} CẢNH BÁO BẢO MẬT - {sev.name} (×{len(fields)})",
+            color=_SEV_COLORS[sev]
+        )
+        for _, name, value in fields:
+            embed.add_field(name=name, value=value, inline=False)
+        embed.add_field(**_NOTIFICATION_SOURCE_FIELD)
+        if sev >= Sev.DANGER:
+            embed.add_field(**_NOTIFICATION_ACTION_FIELD)
+        return embed
+    
+    @staticmethod
+    def _build_notification_embed(message, sev, now):
+        """Dựng embed thông báo bảo mật từ template"""
+        fields = [
+            {"name": "🕐 Thời gian", "value": now.strftime(_STRFTIME_FULL), "inline": True},
+            _NOTIFICATION_SOURCE_FIELD
+        ]
+        if sev >= Sev.DANGER:
+            fields.append(_NOTIFICATION_ACTION_FIELD)
+        
+        return Embed.from_dict({
+            "title": f"{_SEV_ICONS[sev]} CẢNH BÁO BẢO MẬT - {sev.name}",
+            "description": message,
+            "color": _SEV_COLORS[sev],
+            "fields": fields
+        })
+    
+    async def send_authentication_failure_alert(self, step, attempts, details=""):
+        """Ghi nhận thất bại, gom các lần thất bại liên tiếp trong 2 giây thành 1 alert"""
+        if not self.bot or not self.loop or self.loop.is_closed():
             return
-            
-        channel = self.bot.get_channel(CHANNEL_ID)
-        if not channel:
+        
+        with self._failures_lock:
+            now = datetime.now()
+            self._pending_failures.append((step, attempts, details, now))
+            self._roll_failed_count(now.date())
+            self.failed_attempts_count += 1
+        
+        # Flush task phải chạy trong loop của bot (caller có thể dùng asyncio.run riêng)
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        
+        if running_loop is self.loop:
+            self._schedule_failure_flush()
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self._schedule_failure_flush)
+            except RuntimeError as e:
+                logger.warning(f"Discord send failed: {e}")
+    
+    def _roll_failed_count(self, today):
+        """Sang ngày mới thì đưa bộ đếm thất bại 'hôm nay' về 0"""
+        if today != self._failed_count_date:
+            self._failed_count_date = today
+            self.failed_attempts_count = 0
+    
+    def _failed_today(self):
+        with self._failures_lock:
+            self._roll_failed_count(datetime.now().date())
+            return self.failed_attempts_count
+    
+    def _schedule_failure_flush(self):
+        """Tạo flush task nếu chưa có (chạy trong loop của bot)"""
+        if self._failure_flush_task is None or self._failure_flush_task.done():
+            self._failure_flush_task = asyncio.create_task(self._flush_failures())
+    
+    async def _flush_failures(self, delay=2):
+        """Gửi 1 embed cho toàn bộ thất bại tích lũy trong cửa sổ 2 giây (delay=0: gửi ngay khi tắt)"""
+        if delay:
+            await asyncio.sleep(delay)
+        
+        with self._failures_lock:
+            failures, self._pending_failures = self._pending_failures, []
+        if not failures:
             return
         
-        # Màu sắc theo mức độ cảnh báo
-        colors = {
-            "SUCCESS": 0x00ff00,    # Xanh lá - Thành công
-            "INFO": 0x0099ff,       # Xanh dương - Thông tin
-            "WARNING": 0xffa500,    # Cam - Cảnh báo
-            "DANGER": 0xff0000,     # Đỏ - Nguy hiểm
-            "CRITICAL": 0x8b0000    # Đỏ đậm - Nghiêm trọng
-        }
+        max_attempts = max(f[1] for f in failures)
+        steps = ", ".join(dict.fromkeys(_step_name(f[0]).upper() for f in failures))
+        first_at, last_at = failures[0][3], failures[-1][3]
         
-        # Icon theo mức độ
-        icons = {
-            "SUCCESS": "✅",
-            "INFO": "ℹ️",  
-            "WARNING": "⚠️",
-            "DANGER": "🚨",
-            "CRITICAL": "🔴"
-        }
+        # Xác định mức độ cảnh báo
+        if max_attempts >= 3:
+            title = "🚨 VI PHẠM BẢO MẬT NGHIÊM TRỌNG"
+            color = 0x8b0000
+        elif max_attempts >= 2:
+            title = "🔴 NHIỀU LẦN THẤT BẠI"
+            color = 0xff0000
+        else:
+            title = "⚠️ XÁC THỰC THẤT BẠI"
+            color = 0xffa500
         
-        embed = discord.Embed(
-            title=f"{icons.get(alert_type, 'ℹ️')} CẢNH BÁO BẢO MẬT - {alert_type}",
-            description=message,
-            color=colors.get(alert_type, 0x0099ff),
-            timestamp=datetime.now()
-        )
+        embed = Embed(title=title, color=color)
         
-        embed.add_field(name="🕐 Thời gian", value=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), inline=True)
-        embed.add_field(name="📍 Nguồn", value="Hệ thống bảo mật", inline=True)
+        embed.add_field(name="🔍 Bước thất bại", value=steps, inline=True)
+        embed.add_field(name="🔢 Lần thử", value=f"{max_attempts}/5", inline=True)
+        if len(failures) > 1:
+            period = f"{first_at.strftime(_STRFTIME_HMS)} - {last_at.strftime(_STRFTIME_HMS)}"
+        else:
+            period = last_at.strftime(_STRFTIME_HMS)
+        embed.add_field(name="⏰ Thời gian", value=period, inline=True)
         
-        if alert_type in ["DANGER", "CRITICAL"]:
-            embed.add_field(name="🔔 Cần hành động", value="Kiểm tra hệ thống ngay!", inline=False)
+        if len(failures) > 1:
+            burst = "\n".join(
+                f"{f[3].strftime(_STRFTIME_HMS)} - {_step_name(f[0])} ({f[1]}/5)"
+                for f in failures
+            )
+            embed.add_field(name=f"📈 ×{len(failures)} trong 2s", value=burst[:1000], inline=False)
         
-        # FIXED: Không dùng timeout để tránh context manager error
-        await self._safe_send(channel.send, embed=embed)
-    
-    async def send_authentication_failure_alert(self, step, attempts, details=""):
-        """ULTRA SIMPLE: Gửi alert không có timeout context"""
-        try:
-            if not self.bot:
-                return
-                
-            channel = self.bot.get_channel(CHANNEL_ID)
-            if not channel:
-                return
-            
-            # Xác định mức độ cảnh báo
-            if attempts >= 3:
-                title = "🚨 VI PHẠM BẢO MẬT NGHIÊM TRỌNG"
-                color = 0x8b0000
-            elif attempts >= 2:
-                title = "🔴 NHIỀU LẦN THẤT BẠI"
-                color = 0xff0000
+        # Chi tiết của mọi lần thất bại (bỏ trùng, giữ thứ tự)
+        details = "\n".join(dict.fromkeys(f[2] for f in failures if f[2]))
+        if details:
+            embed.add_field(name="📋 Chi tiết", value=details[:1000], inline=False)
+        
+        if max_attempts >= 3:
+            embed.add_field(name="🚨 CẢNH BÁO", value="Có thể có hành vi xâm nhập!", inline=False)
+        
+        # Vi phạm nghiêm trọng gửi ngay, còn lại gộp qua hàng đợi
+        if max_attempts >= 3:
+            if await self._send_embeds([embed]):
+                logger.info(f"✅ Discord alert sent: {steps} - attempt {max_attempts} (x{len(failures)})")
             else:
-                title = "⚠️ XÁC THỰC THẤT BẠI"
-                color = 0xffa500
-            
-            embed = discord.Embed(title=title, color=color, timestamp=datetime.now())
-            
-            # Việt hóa step names
-            step_names = {
-                'face': 'Nhận diện khuôn mặt',
-                'fingerprint': 'Vân tay',
-                'rfid': 'Thẻ từ', 
-                'passcode': 'Mật khẩu'
-            }
-            
-            embed.add_field(name="🔍 Bước thất bại", value=step_names.get(step, step).upper(), inline=True)
-            embed.add_field(name="🔢 Lần thử", value=f"{attempts}/5", inline=True)
-            embed.add_field(name="⏰ Thời gian", value=datetime.now().strftime("%H:%M:%S"), inline=True)
-            
-            if details:
-                embed.add_field(name="📋 Chi tiết", value=details[:500], inline=False)
-            
-            if attempts >= 3:
-                embed.add_field(name="🚨 CẢNH BÁO", value="Có thể có hành vi xâm nhập!", inline=False)
-            
-            # SIMPLEST: Chỉ gửi trực tiếp
-            await channel.send(embed=embed)
-            logger.info(f"✅ Discord alert sent: {step} - attempt {attempts}")
-            
-        except Exception as e:
-            logger.error(f"Discord send failed: {e}")
-            # KHÔNG raise exception
+                logger.warning(f"❌ Discord alert not sent: {steps} - attempt {max_attempts} (x{len(failures)})")
+        elif self._put_alert(embed):
+            logger.info(f"📨 Discord alert queued: {steps} - attempt {max_attempts} (x{len(failures)})")
 
     async def record_authentication_success(self, step):
         """Ghi lại thành công xác thực"""
-        step_names = {
-            'face': 'Nhận diện khuôn mặt',
-            'fingerprint': 'Vân tay', 
-            'rfid': 'Thẻ từ',
-            'passcode': 'Mật khẩu'
-        }
-        
-        message = f"✅ **{step_names.get(step, step).upper()} THÀNH CÔNG**\nBước xác thực hoàn tất thành công"
+        message = f"✅ **{_step_name(step).upper()} THÀNH CÔNG**\nBước xác thực hoàn tất thành công"
         await self.send_security_notification(message, "SUCCESS")
     
     # ===== FIXED BOT MANAGEMENT =====
@@ -610,41 +1072,92 @@ class DiscordSecurityBot:
         
         def run_bot():
             try:
-                # Tạo event loop mới cho thread này
-                self.loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self.loop)
-                
-                # Chạy bot
-                self.loop.run_until_complete(self.bot.start(TOKEN))
+                # asyncio.run tự tạo/dọn event loop cho thread này (uvloop nếu có)
+                if uvloop is None:
+                    asyncio.run(self._run_bot())
+                elif hasattr(uvloop, 'run'):
+                    uvloop.run(self._run_bot())
+                else:
+                    # uvloop < 0.18 chưa có uvloop.run - tự tạo loop uvloop cho thread này
+                    loop = uvloop.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    try:
+                        loop.run_until_complete(self._run_bot())
+                        loop.run_until_complete(loop.shutdown_asyncgens())
+                    finally:
+                        asyncio.set_event_loop(None)
+                        loop.close()
             except Exception as e:
                 logger.error(f"Discord bot error: {e}")
-            finally:
-                if self.loop and not self.loop.is_closed():
-                    self.loop.close()
         
         self.bot_thread = threading.Thread(target=run_bot, daemon=True)
         self.bot_thread.start()
         return True
     
+    async def _run_bot(self):
+        """Coroutine chính của thread bot - lưu loop để thread khác schedule vào"""
+        self.loop = asyncio.get_running_loop()
+        logger.info(f"🔁 Discord event loop: {type(self.loop).__module__}.{type(self.loop).__name__}")
+        async with self.bot:
+            await self.bot.start(self.token)
+    
+    async def _drain_alerts(self):
+        """Gửi nốt thất bại đang chờ debounce và chờ worker gửi hết hàng đợi alert"""
+        if self._failure_flush_task and not self._failure_flush_task.done():
+            self._failure_flush_task.cancel()
+        await self._flush_failures(delay=0)
+        
+        if self._alert_queue is not None and self._alert_worker_task and not self._alert_worker_task.done():
+            await self._alert_queue.join()
+    
+    async def _graceful_close(self):
+        """Gửi nốt alert, hủy các background task và đóng bot trong tổng 2.5s (chạy trong loop của bot)"""
+        deadline = asyncio.get_running_loop().time() + 2.5
+        
+        # Alert bảo mật còn chờ (kể cả thông báo tắt hệ thống) phải gửi trước khi hủy worker
+        try:
+            await asyncio.wait_for(self._drain_alerts(), timeout=1.5)
+        except asyncio.TimeoutError:
+            logger.warning("Discord alert drain timeout (1.5s) - một số alert có thể chưa gửi")
+        except Exception as e:
+            logger.error(f"Discord alert drain error: {e}")
+        
+        for task in (self._alert_worker_task, self._failure_flush_task, self._auth_prune_task, *self._live_tasks.values()):
+            if task:
+                task.cancel()
+        
+        # Hủy relock task đang chờ -> finally khóa cửa ngay trước khi loop đóng
+        if self._relock_task and not self._relock_task.done():
+            self._relock_task.cancel()
+            await asyncio.gather(self._relock_task, return_exceptions=True)
+        
+        try:
+            remaining = max(0.5, deadline - asyncio.get_running_loop().time())
+            await asyncio.wait_for(self.bot.close(), timeout=remaining)
+        except asyncio.TimeoutError:
+            logger.warning("Discord bot close timeout (2.5s)")
+    
+    @staticmethod
+    def _log_close_result(future):
+        """Callback: log lỗi nếu _graceful_close thất bại"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Discord bot close error: {future.exception()}")
+    
     def stop_bot(self):
         """FIXED: Dừng bot với proper async cleanup"""
         try:
             if self.bot and self.loop:
                 # Đóng bot trong loop của nó
                 if not self.loop.is_closed():
-                    # Schedule bot.close() trong loop của bot
-                    future = asyncio.run_coroutine_threadsafe(self.bot.close(), self.loop)
-                    # Đợi tối đa 3 giây
+                    # _graceful_close tự giới hạn 2.5s nên result() không bị treo
+                    future = asyncio.run_coroutine_threadsafe(self._graceful_close(), self.loop)
+                    future.add_done_callback(self._log_close_result)
                     future.result(timeout=3)
             
             # Đợi thread dừng
             if self.bot_thread and self.bot_thread.is_alive():
                 self.bot_thread.join(timeout=3)
                 
-            # Đóng executor
-            if hasattr(self, 'executor'):
-                self.executor.shutdown(wait=False)
-                
             logger.info("Discord bot stopped successfully")
             
         except Exception as e:
@@ -8,29 +8,44 @@ Status: Production Ready - Complete Focus Management + Authentication Pause
 
 import cv2
 import time
-import json
 import os
 import logging
+import functools
+import importlib
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, font
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass
+from enum import Enum
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+# orjson (nhanh hơn) nếu có - fallback về json chuẩn; cả 2 làm việc với bytes
 try:
-    from gpiozero import LED, PWMOutputDevice
-    from pyfingerprint.pyfingerprint import PyFingerprint
-    import board
-    import busio
-    from adafruit_pn532.i2c import PN532_I2C
-    HARDWARE_AVAILABLE = True
-except ImportError as e:
-    logging.error(f"Không thể import thư viện phần cứng: {e}")
-    HARDWARE_AVAILABLE = False
+    import orjson
+    _LOADS = orjson.loads
+    _DUMPS = lambda obj: orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    import json
+    _LOADS = json.loads
+    _DUMPS = lambda obj: json.dumps(obj, indent=2).encode()
 
-logger = logging.getLogger(__name__)
+@functools.lru_cache(maxsize=None)
+def _hardware_module(name: str):
+    """Import lazy thư viện phần cứng lúc cần dùng (1 lần), None nếu không có"""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        logger.error(f"Không thể import thư viện phần cứng: {e}")
+        return None
+
+# Pool dùng chung cho tác vụ phần cứng nền (quét RFID...): tái dùng thread, tối đa 2 việc song song
+_BG = ThreadPoolExecutor(max_workers=2, thread_name_prefix='hw')
 
 # ==== COLOR SCHEME ====
 class Colors:
@@ -46,13 +61,80 @@ class Colors:
     BORDER = "#E0E0E0"
     DARK_BG = "#263238"
 
+# Chu kỳ poll cảm biến vân tay (giây) khi chờ đặt/nhấc ngón tay
+_FP_POLL = 0.02
+_FP_TICK_MS = int(_FP_POLL * 1000)
+
+# Trạng thái enrollment vân tay (state machine tick từ Tk event loop)
+class _EnrollState(Enum):
+    WAIT_FIRST = 1
+    WAIT_RELEASE = 2
+    WAIT_SECOND = 3
+    DONE = 4
+
+# ==== SCREEN SIZE CACHE ====
+_SCREEN_CACHE = None
+
+def _screen_size(widget):
+    """Kích thước màn hình (rộng, cao) - hỏi X server 1 lần cho cả process"""
+    global _SCREEN_CACHE
+    if _SCREEN_CACHE is None:
+        _SCREEN_CACHE = (widget.winfo_screenwidth(), widget.winfo_screenheight())
+    return _SCREEN_CACHE
+
+# ==== FONT CACHE ====
+# tkfont.Font dựng lazy lần đầu dùng (cần Tk root), dùng lại cho mọi widget
+_FONTS = {}
+
+def get_font(family, size, weight='normal'):
+    """Lấy tkfont.Font đã cache theo (family, size, weight)"""
+    key = (family, size, weight)
+    f = _FONTS.get(key)
+    if f is None:
+        f = _FONTS[key] = font.Font(family=family, size=size, weight=weight)
+    return f
+
+# ==== ADMIN BUTTON STYLES ====
+# (màu nền, màu nền khi được chọn) cho 8 nút menu admin
+_ADMIN_BTN_COLORS = [
+    (Colors.WARNING, Colors.WARNING),         # 1 - Password
+    (Colors.SUCCESS, Colors.SUCCESS),         # 2 - Add RFID
+    (Colors.ERROR, Colors.ERROR),             # 3 - Remove RFID
+    ("#2E7D32", "#388E3C"),                   # 4 - Fingerprint
+    (Colors.ACCENT, Colors.ACCENT),           # 5 - Remove Fingerprint
+    (Colors.WARNING, Colors.WARNING),         # 6 - Mode toggle
+    ("#FF5722", "#FF7043"),                   # 7 - Speaker settings
+    (Colors.TEXT_SECONDARY, Colors.TEXT_SECONDARY)  # 8 - Exit
+]
+_ADMIN_STYLES = None
+
+def _admin_button_styles(master):
+    """Định nghĩa ttk style cho nút admin 1 lần; trạng thái 'selected' = nút đang chọn"""
+    global _ADMIN_STYLES
+    if _ADMIN_STYLES is None:
+        style = ttk.Style(master)
+        names = []
+        for i, (bg, selected_bg) in enumerate(_ADMIN_BTN_COLORS):
+            name = f'Admin{i}.TButton'
+            style.configure(name, foreground='white', background=bg,
+                            font=get_font('Arial', 17, 'bold'), anchor='w',
+                            padding=(10, 14), relief=tk.RAISED, borderwidth=5)
+            style.map(name,
+                      background=[('selected', selected_bg), ('active', bg)],
+                      relief=[('selected', tk.SUNKEN)],
+                      borderwidth=[('selected', 7)])
+            names.append(name)
+        _ADMIN_STYLES = names
+    return _ADMIN_STYLES
+
 # ==== THREAD-SAFE FINGERPRINT MANAGER ====
 class ThreadSafeFingerprintManager:
     """Thread-safe wrapper cho fingerprint sensor để tránh conflicts"""
     
     def __init__(self, fingerprint_sensor):
         self.fingerprint = fingerprint_sensor
-        self._lock = threading.RLock()
+        # Condition: chờ sensor rảnh bằng wait/notify thay vì poll sleep(0.1)
+        self._cond = threading.Condition()
         self._in_use = False
         self._current_user = None
         self._acquired_time = None
@@ -61,34 +143,30 @@ class ThreadSafeFingerprintManager:
     
     def acquire_sensor(self, user_id: str, timeout: float = 10.0):
         """Acquire exclusive access to fingerprint sensor"""
-        start_time = time.time()
-        
         logger.info(f"🔒 Attempting to acquire fingerprint sensor for {user_id}")
         
-        while time.time() - start_time < timeout:
-            with self._lock:
-                if not self._in_use:
-                    self._in_use = True
-                    self._current_user = user_id
-                    self._acquired_time = time.time()
-                    logger.info(f"  Fingerprint sensor acquired by {user_id}")
-                    return True
-                else:
-                    logger.debug(f"⏳ Sensor busy, current user: {self._current_user}")
-            
-            time.sleep(0.1)
+        with self._cond:
+            if self._in_use:
+                logger.debug(f"⏳ Sensor busy, current user: {self._current_user}")
+            if self._cond.wait_for(lambda: not self._in_use, timeout=timeout):
+                self._in_use = True
+                self._current_user = user_id
+                self._acquired_time = time.monotonic()
+                logger.info(f"  Fingerprint sensor acquired by {user_id}")
+                return True
         
         logger.warning(f"⏰ Fingerprint sensor acquisition timeout for {user_id}")
         return False
     
     def release_sensor(self, user_id: str):
         """Release fingerprint sensor"""
-        with self._lock:
+        with self._cond:
             if self._current_user == user_id:
-                duration = time.time() - self._acquired_time if self._acquired_time else 0
+                duration = time.monotonic() - self._acquired_time if self._acquired_time else 0
                 self._in_use = False
                 self._current_user = None
                 self._acquired_time = None
+                self._cond.notify_all()
                 logger.info(f"🔓 Fingerprint sensor released by {user_id} (held for {duration:.1f}s)")
                 return True
             else:
@@ -96,32 +174,46 @@ class ThreadSafeFingerprintManager:
                 return False
     
     def is_available(self):
-        """Check if sensor is available"""
-        with self._lock:
-            return not self._in_use
+        """Check if sensor is available (snapshot, không khóa - cần chắc thì dùng acquire_sensor)"""
+        return not self._in_use
     
     def get_current_user(self):
-        """Get current user of sensor"""
-        with self._lock:
-            return self._current_user
+        """Get current user of sensor (snapshot, không khóa)"""
+        return self._current_user
     
     def force_release(self):
         """Force release sensor (emergency use)"""
-        with self._lock:
+        with self._cond:
             old_user = self._current_user
             self._in_use = False
             self._current_user = None
             self._acquired_time = None
+            self._cond.notify_all()
             logger.warning(f"🚨 Force released sensor from {old_user}")
 
 # ==== ENHANCED BUZZER MANAGER ====
+# Pattern buzzer: (tần số, âm lượng, thời gian) - tuple bất biến, dựng 1 lần
+_BEEP_PATTERNS = {
+    "success": ((2000, 0.5, 0.3), (2500, 0.5, 0.3)),
+    "error": ((400, 0.8, 0.8),),
+    "click": ((1500, 0.3, 0.1),),
+    "warning": ((800, 0.6, 0.2), (600, 0.6, 0.2)),
+    "startup": ((1000, 0.4, 0.2), (1500, 0.4, 0.2), (2000, 0.4, 0.3)),
+    "mode_change": ((1200, 0.4, 0.2), (1800, 0.4, 0.2), (2400, 0.4, 0.3))
+}
+
 class EnhancedBuzzerManager:
     def __init__(self, gpio_pin: int, speaker=None):
         self.speaker = speaker
+        # Tra speaker.beep 1 lần thay vì hasattr mỗi lần bấm
+        self._speaker_beep = getattr(speaker, 'beep', None) if speaker else None
+        self._queue = queue.Queue(maxsize=8)
+        self._worker = None
         
         try:
-            if HARDWARE_AVAILABLE:
-                self.buzzer = PWMOutputDevice(gpio_pin)
+            gpiozero = _hardware_module('gpiozero')
+            if gpiozero is not None:
+                self.buzzer = gpiozero.PWMOutputDevice(gpio_pin)
                 self.buzzer.off()
                 logger.info(f"  Buzzer khởi tạo thành công trên GPIO {gpio_pin}")
             else:
@@ -130,40 +222,50 @@ class EnhancedBuzzerManager:
         except Exception as e:
             logger.error(f"❌ Lỗi khởi tạo buzzer: {e}")
             self.buzzer = None
+        
+        # 1 worker thread duy nhất phát tuần tự các pattern (không spawn thread mỗi lần beep)
+        if self.buzzer is not None:
+            # Setter đã bind sẵn cho vòng phát (không tra thuộc tính mỗi bước)
+            self._freq = functools.partial(setattr, self.buzzer, 'frequency')
+            self._val = functools.partial(setattr, self.buzzer, 'value')
+            self._worker = threading.Thread(target=self._run, daemon=True)
+            self._worker.start()
+    
+    def _run(self):
+        """Worker: lấy các bước pattern từ hàng đợi và phát lần lượt trên PWM"""
+        set_freq, set_val, off, sleep = self._freq, self._val, self.buzzer.off, time.sleep
+        while True:
+            steps = self._queue.get()
+            try:
+                for freq, volume, duration in steps:
+                    set_freq(freq)
+                    set_val(volume)
+                    sleep(duration)
+                    off()
+                    sleep(0.05)
+            except Exception as e:
+                logger.error(f"Lỗi buzzer: {e}")
     
     def beep(self, pattern: str):
         if self.buzzer is None:
             logger.debug(f"🔊 BEEP: {pattern}")
         else:
-            patterns = {
-                "success": [(2000, 0.5, 0.3), (2500, 0.5, 0.3)],
-                "error": [(400, 0.8, 0.8)],
-                "click": [(1500, 0.3, 0.1)],
-                "warning": [(800, 0.6, 0.2), (600, 0.6, 0.2)],
-                "startup": [(1000, 0.4, 0.2), (1500, 0.4, 0.2), (2000, 0.4, 0.3)],
-                "mode_change": [(1200, 0.4, 0.2), (1800, 0.4, 0.2), (2400, 0.4, 0.3)]
-            }
-            
-            if pattern in patterns:
-                def beep_thread():
-                    try:
-                        for freq, volume, duration in patterns[pattern]:
-                            if self.buzzer and HARDWARE_AVAILABLE:
-                                self.buzzer.frequency = freq
-                                self.buzzer.value = volume
-                                time.sleep(duration)
-                                self.buzzer.off()
-                                time.sleep(0.05)
-                    except Exception as e:
-                        logger.error(f"Lỗi buzzer: {e}")
-                
-                threading.Thread(target=beep_thread, daemon=True).start()
+            steps = _BEEP_PATTERNS.get(pattern)
+            if steps is not None:
+                try:
+                    self._queue.put_nowait(steps)
+                except queue.Full:
+                    # Bấm phím dồn dập - bỏ bớt beep thay vì xếp hàng dài
+                    pass
         
-        if self.speaker and hasattr(self.speaker, 'beep'):
-            self.speaker.beep(pattern)
+        if self._speaker_beep is not None:
+            self._speaker_beep(pattern)
 
 # ==== ENHANCED NUMPAD DIALOG - PERFECT FOCUS ====
 class EnhancedNumpadDialog:
+    # Phím số (hàng số + numpad) -> ký tự nhập, dùng chung cho mọi dialog
+    _DIGIT_MAP = {ks: ks[-1] for i in range(10) for ks in (str(i), f'KP_{i}')}
+    
     def __init__(self, parent, title, prompt, is_password=False, buzzer=None, speaker=None):
         self.parent = parent
         self.title = title
@@ -176,6 +278,8 @@ class EnhancedNumpadDialog:
         self.selected_row = 1
         self.selected_col = 1
         self.button_widgets = {}
+        self._last_fg = None
+        self._prev_pos = None
         
     def show(self) -> Optional[str]:
         if self.speaker:
@@ -184,61 +288,133 @@ class EnhancedNumpadDialog:
             else:
                 self.speaker.speak("click")
         
+        # Dùng lại dialog đã dựng sẵn trên parent (chỉ withdraw khi đóng)
+        cached = getattr(self.parent, '_numpad_cache', None)
+        if cached is None or not cached._alive():
+            cached = self
+            self._build()
+            if self.parent is not None:
+                self.parent._numpad_cache = self
+        
+        cached.buzzer = self.buzzer
+        cached.speaker = self.speaker
+        self.dialog = cached.dialog
+        self.result = cached._run(self.title, self.prompt, self.is_password)
+        return self.result
+    
+    def _alive(self) -> bool:
+        try:
+            return bool(self.dialog.winfo_exists())
+        except Exception:
+            return False
+    
+    def _build(self):
+        """Dựng Toplevel + widget một lần, các lần sau chỉ _reset()"""
         self.dialog = tk.Toplevel(self.parent)
-        self.dialog.title(self.title)
+        self.dialog.withdraw()
         self.dialog.geometry("600x750")
         self.dialog.configure(bg=Colors.DARK_BG)
         self.dialog.resizable(False, False)
         self.dialog.transient(self.parent)
-        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self._on_cancel)
         
-        # 🎯 PERFECT FOCUS SETUP
-        self.dialog.lift()
-        self.dialog.focus_force()
-        self.dialog.attributes('-topmost', True)
+        self._done_var = tk.IntVar(self.dialog, 0)
+        self._title_var = tk.StringVar(self.dialog)
+        self._prompt_var = tk.StringVar(self.dialog)
         
         # Better centering
-        self.dialog.update_idletasks()
-        x = (self.dialog.winfo_screenwidth() // 2) - 300
-        y = (self.dialog.winfo_screenheight() // 2) - 375
+        sw, sh = _screen_size(self.dialog)
+        x = (sw // 2) - 300
+        y = (sh // 2) - 375
         self.dialog.geometry(f'600x750+{x}+{y}')
         
         self._create_widgets()
         self._setup_bindings()
+        
+        # Dialog bị hủy theo parent -> nhả wait_variable
+        self.dialog.bind('<Destroy>', self._on_destroy, add='+')
+        self.dialog.bind('<FocusOut>', self._on_focus_out, add='+')
+    
+    def _on_destroy(self, event):
+        if event.widget is self.dialog:
+            try:
+                self._done_var.set(1)
+            except tk.TclError:
+                pass
+    
+    def _reset(self, title, prompt, is_password):
+        self.title = title
+        self.prompt = prompt
+        self.is_password = is_password
+        self.result = None
+        self.input_text = ""
+        self.selected_row = 1
+        self.selected_col = 1
+        
+        self.dialog.title(title)
+        self._title_var.set(title)
+        self._prompt_var.set(prompt or "")
+        if prompt:
+            self.prompt_label.pack()
+        else:
+            self.prompt_label.pack_forget()
+        
+        self._update_display()
         self._highlight_button()
+    
+    def _run(self, title, prompt, is_password) -> Optional[str]:
+        self._reset(title, prompt, is_password)
+        self._done_var.set(0)
         
-        # 🎯 MULTIPLE FOCUS ATTEMPTS - PERFECT TIMING
-        self.dialog.after(50, self._ensure_focus)
-        self.dialog.after(150, self._ensure_focus)
-        self.dialog.after(300, self._ensure_focus)
-        self.dialog.after(500, self._ensure_focus)  # Extra attempt
+        self.dialog.deiconify()
+        self.dialog.grab_set()
         
-        self.dialog.wait_window()
+        # 🎯 PERFECT FOCUS SETUP
+        self.dialog.lift()
+        self.dialog.focus_force()
+        self.dialog.attributes('-topmost', True)
+        
+        # 🎯 1 lần kiểm tra sau khi map; mất focus sau đó thì <FocusOut> lo
+        self.dialog.after_idle(self._ensure_focus)
+        
+        self.dialog.wait_variable(self._done_var)
         return self.result
     
+    def _close(self):
+        try:
+            self.dialog.grab_release()
+            self.dialog.withdraw()
+        except tk.TclError:
+            pass
+        self._done_var.set(1)
+    
     def _ensure_focus(self):
-        """🎯 PERFECT FOCUS: Multiple attempts to maintain focus"""
+        """🎯 Đưa focus về dialog nếu đang hiện mà focus đã rời khỏi nó"""
         try:
-            if self.dialog and self.dialog.winfo_exists():
-                self.dialog.lift()
-                self.dialog.focus_force()
-                self.dialog.focus_set()
-                self.dialog.focus()
+            if self.dialog and self.dialog.winfo_exists() and self.dialog.winfo_viewable():
+                current = self.dialog.focus_get()
+                if current is None or current.winfo_toplevel() is not self.dialog:
+                    self.dialog.lift()
+                    self.dialog.focus_force()
         except:
             pass
     
+    def _on_focus_out(self, event):
+        # Chỉ khi chính Toplevel mất focus (bỏ qua chuyển focus giữa các nút con)
+        if event.widget is self.dialog:
+            self.dialog.after_idle(self._ensure_focus)
+    
     def _create_widgets(self):
         # Header
         header_frame = tk.Frame(self.dialog, bg=Colors.PRIMARY, height=100)
         header_frame.pack(fill=tk.X)
         header_frame.pack_propagate(False)
         
-        tk.Label(header_frame, text=self.title, 
-                font=('Arial', 26, 'bold'), fg='white', bg=Colors.PRIMARY).pack(expand=True)
+        tk.Label(header_frame, textvariable=self._title_var, 
+                font=get_font('Arial', 26, 'bold'), fg='white', bg=Colors.PRIMARY).pack(expand=True)
         
-        if self.prompt:
-            tk.Label(header_frame, text=self.prompt,
-                    font=('Arial', 18), fg='white', bg=Colors.PRIMARY).pack()
+        self.prompt_label = tk.Label(header_frame, textvariable=self._prompt_var,
+                font=get_font('Arial', 18), fg='white', bg=Colors.PRIMARY)
         
         # Display
         display_frame = tk.Frame(self.dialog, bg=Colors.CARD_BG, height=140)
@@ -247,7 +423,7 @@ class EnhancedNumpadDialog:
         
         self.display_var = tk.StringVar()
         self.display_label = tk.Label(display_frame, textvariable=self.display_var,
-                font=('Courier New', 36, 'bold'), fg=Colors.SUCCESS, bg=Colors.CARD_BG,
+                font=get_font('Courier New', 36, 'bold'), fg=Colors.SUCCESS, bg=Colors.CARD_BG,
                 relief=tk.SUNKEN, bd=4)
         self.display_label.pack(expand=True, fill=tk.BOTH, padx=18, pady=18)
         
@@ -265,7 +441,7 @@ class EnhancedNumpadDialog:
         for i, row in enumerate(buttons_layout):
             for j, text in enumerate(row):
                 color = Colors.ERROR if text in ['CLR', 'XOA'] else Colors.PRIMARY
-                btn = tk.Button(numpad_frame, text=text, font=('Arial', 22, 'bold'),
+                btn = tk.Button(numpad_frame, text=text, font=get_font('Arial', 22, 'bold'),
                               bg=color, fg='white', width=6, height=2,
                               relief=tk.RAISED, bd=5,
                               command=lambda t=text: self._on_key_click(t))
@@ -276,13 +452,13 @@ class EnhancedNumpadDialog:
         control_frame = tk.Frame(self.dialog, bg=Colors.DARK_BG)
         control_frame.pack(pady=30)
         
-        self.ok_btn = tk.Button(control_frame, text="XAC NHAN", font=('Arial', 20, 'bold'),
+        self.ok_btn = tk.Button(control_frame, text="XAC NHAN", font=get_font('Arial', 20, 'bold'),
                  bg=Colors.SUCCESS, fg='white', width=14, height=2,
                  relief=tk.RAISED, bd=5,
                  command=self._on_ok)
         self.ok_btn.pack(side=tk.LEFT, padx=20)
         
-        self.cancel_btn = tk.Button(control_frame, text="HUY", font=('Arial', 20, 'bold'),
+        self.cancel_btn = tk.Button(control_frame, text="HUY", font=get_font('Arial', 20, 'bold'),
                  bg=Colors.ACCENT, fg='white', width=14, height=2,
                  relief=tk.RAISED, bd=5,
                  command=self._on_cancel)
@@ -290,41 +466,48 @@ class EnhancedNumpadDialog:
         
         self.button_widgets[(-1, 0)] = self.ok_btn
         self.button_widgets[(-1, 1)] = self.cancel_btn
-        
-        self._update_display()
     
     def _setup_bindings(self):
-        # Universal keyboard support
-        for i in range(10):
-            self.dialog.bind(str(i), lambda e, key=str(i): self._on_key_click(key))
-            self.dialog.bind(f'<KP_{i}>', lambda e, key=str(i): self._on_key_click(key))
+        # Universal keyboard support - 1 handler <Key> + bảng dispatch theo keysym
+        # (phím số tra qua _DIGIT_MAP của class)
+        keymap = {}
         
         # Confirm keys
-        self.dialog.bind('<Return>', lambda e: self._on_ok())
-        self.dialog.bind('<KP_Enter>', lambda e: self._on_ok())
-        self.dialog.bind('<KP_Add>', lambda e: self._on_ok())
+        for keysym in ('Return', 'KP_Enter', 'KP_Add'):
+            keymap[keysym] = self._on_ok
         
         # Cancel keys
-        self.dialog.bind('<period>', lambda e: self._on_cancel())
-        self.dialog.bind('<KP_Decimal>', lambda e: self._on_cancel())
-        self.dialog.bind('<Escape>', lambda e: self._on_cancel())
-        self.dialog.bind('<KP_Divide>', lambda e: self._on_cancel())
-        self.dialog.bind('<KP_Multiply>', lambda e: self._on_cancel())
+        for keysym in ('period', 'KP_Decimal', 'Escape', 'KP_Divide', 'KP_Multiply'):
+            keymap[keysym] = self._on_cancel
         
         # Delete keys
-        self.dialog.bind('<BackSpace>', lambda e: self._on_key_click('XOA'))
-        self.dialog.bind('<Delete>', lambda e: self._on_key_click('CLR'))
-        self.dialog.bind('<KP_Subtract>', lambda e: self._on_key_click('XOA'))
+        keymap['BackSpace'] = keymap['KP_Subtract'] = lambda: self._on_key_click('XOA')
+        keymap['Delete'] = lambda: self._on_key_click('CLR')
         
         # Navigation
-        self.dialog.bind('<Up>', lambda e: self._navigate(-1, 0))
-        self.dialog.bind('<Down>', lambda e: self._navigate(1, 0))
-        self.dialog.bind('<Left>', lambda e: self._navigate(0, -1))
-        self.dialog.bind('<Right>', lambda e: self._navigate(0, 1))
-        self.dialog.bind('<space>', lambda e: self._activate_selected())
+        keymap['Up'] = lambda: self._navigate(-1, 0)
+        keymap['Down'] = lambda: self._navigate(1, 0)
+        keymap['Left'] = lambda: self._navigate(0, -1)
+        keymap['Right'] = lambda: self._navigate(0, 1)
+        keymap['space'] = self._activate_selected
+        
+        self._keymap = keymap
+        self.dialog.bind('<Key>', self._on_key)
         
         self.dialog.focus_set()
     
+    def _on_key(self, event):
+        ks = event.keysym
+        digit = self._DIGIT_MAP.get(ks)
+        if digit is not None:
+            self._on_key_click(digit)
+            return "break"
+        
+        handler = self._keymap.get(ks)
+        if handler is not None:
+            handler()
+            return "break"
+    
     def _navigate(self, row_delta, col_delta):
         new_row = self.selected_row + row_delta
         new_col = self.selected_col + col_delta
@@ -349,12 +532,17 @@ class EnhancedNumpadDialog:
         self._highlight_button()
     
     def _highlight_button(self):
-        for pos, btn in self.button_widgets.items():
-            btn.config(relief=tk.RAISED, bd=5)
+        # Chỉ cập nhật nút cũ + nút mới thay vì config lại toàn bộ
+        pos = (self.selected_row, self.selected_col)
+        if pos == self._prev_pos:
+            return
         
-        if (self.selected_row, self.selected_col) in self.button_widgets:
-            btn = self.button_widgets[(self.selected_row, self.selected_col)]
-            btn.config(relief=tk.SUNKEN, bd=7)
+        if self._prev_pos in self.button_widgets:
+            self.button_widgets[self._prev_pos].config(relief=tk.RAISED, bd=5)
+        
+        if pos in self.button_widgets:
+            self.button_widgets[pos].config(relief=tk.SUNKEN, bd=7)
+        self._prev_pos = pos
     
     def _activate_selected(self):
         if (self.selected_row, self.selected_col) in self.button_widgets:
@@ -385,12 +573,18 @@ class EnhancedNumpadDialog:
         
         self.display_var.set(display)
         
-        if len(self.input_text) >= 4:
-            self.display_label.config(fg=Colors.SUCCESS)
-        elif len(self.input_text) > 0:
-            self.display_label.config(fg=Colors.WARNING)
+        n = len(self.input_text)
+        if n >= 4:
+            want_fg = Colors.SUCCESS
+        elif n > 0:
+            want_fg = Colors.WARNING
         else:
-            self.display_label.config(fg=Colors.TEXT_SECONDARY)
+            want_fg = Colors.TEXT_SECONDARY
+        
+        # Chỉ config lại màu khi đổi ngưỡng (tránh 1 lệnh Tcl mỗi phím)
+        if want_fg != self._last_fg:
+            self.display_label.config(fg=want_fg)
+            self._last_fg = want_fg
     
     def _on_ok(self):
         if len(self.input_text) >= 1:
@@ -404,11 +598,9 @@ class EnhancedNumpadDialog:
             
             # 🎯 PERFECT PARENT FOCUS RESTORATION - ENHANCED
             if self.parent:
-                self.parent.after(50, lambda: self._restore_parent_focus_enhanced())
-                self.parent.after(200, lambda: self._restore_parent_focus_enhanced())
-                self.parent.after(500, lambda: self._restore_parent_focus_enhanced())
+                self.parent.after_idle(self._restore_parent_focus_enhanced)
             
-            self.dialog.destroy()
+            self._close()
     
     def _on_cancel(self):
         if self.speaker:
@@ -421,11 +613,9 @@ class EnhancedNumpadDialog:
         
         # 🎯 PERFECT PARENT FOCUS RESTORATION - ENHANCED
         if self.parent:
-            self.parent.after(50, lambda: self._restore_parent_focus_enhanced())
-            self.parent.after(200, lambda: self._restore_parent_focus_enhanced())
-            self.parent.after(500, lambda: self._restore_parent_focus_enhanced())
+            self.parent.after_idle(self._restore_parent_focus_enhanced)
         
-        self.dialog.destroy()
+        self._close()
     
     def _restore_parent_focus_enhanced(self):
         """🎯 ENHANCED: Perfect parent focus restoration"""
@@ -435,8 +625,6 @@ class EnhancedNumpadDialog:
                 self.parent.lift()
                 self.parent.attributes('-topmost', True)
                 self.parent.focus_force()
-                self.parent.focus_set()
-                self.parent.focus()
                 
                 # Ensure grab for admin windows
                 if hasattr(self.parent, 'grab_set'):
@@ -445,8 +633,8 @@ class EnhancedNumpadDialog:
                     except:
                         pass
                 
-                # Remove topmost after short delay to allow focus settling
-                self.parent.after(100, lambda: self._remove_topmost_safely())
+                # Bỏ topmost khi Tk rảnh (focus đã chuyển xong)
+                self.parent.after_idle(self._remove_topmost_safely)
                 
                 logger.debug("🎯 Enhanced parent focus fully restored")
         except Exception as e:
@@ -479,7 +667,17 @@ class EnhancedMessageBox:
         return EnhancedMessageBox._show(parent, title, message, "question", ["CO", "KHONG"], buzzer, speaker) == "CO"
     
     @staticmethod
-    def _show(parent, title, message, msg_type, buttons, buzzer=None, speaker=None):
+    def ask_yesno_async(parent, title, message, on_yes, on_no=None, buzzer=None, speaker=None):
+        """Như ask_yesno nhưng không chặn Tk loop: trả về ngay, gọi on_yes/on_no khi người dùng chọn"""
+        def on_close(result):
+            if result == "CO":
+                on_yes()
+            elif on_no:
+                on_no()
+        EnhancedMessageBox._show(parent, title, message, "question", ["CO", "KHONG"], buzzer, speaker, on_close)
+    
+    @staticmethod
+    def _show(parent, title, message, msg_type, buttons, buzzer=None, speaker=None, on_close=None):
         if speaker:
             if msg_type == "success":
                 speaker.speak("success")
@@ -496,60 +694,8 @@ class EnhancedMessageBox:
         dialog.configure(bg=Colors.DARK_BG)
         dialog.transient(parent)
         
-        # 🎯 ULTRA FOCUS SETUP - STAGE 1: DISABLE PARENT COMPLETELY
-        parent_bindings_backup = {}
-        
-        def disable_parent_bindings():
-            """🎯 ULTRA: Completely disable parent window bindings"""
-            try:
-                if hasattr(parent, 'winfo_exists') and parent.winfo_exists():
-                    # Backup and unbind ALL admin shortcuts that could interfere
-                    admin_keys = ['1', '2', '3', '4', '5', '6', '7', '8', 
-                                 '<KP_1>', '<KP_2>', '<KP_3>', '<KP_4>', '<KP_5>', '<KP_6>', '<KP_7>', '<KP_8>',
-                                 '<Return>', '<KP_Enter>', '<KP_Add>', '<space>',
-                                 '<Up>', '<Down>', '<Left>', '<Right>', '<Tab>', '<Shift-Tab>',
-                                 '<Escape>', '<period>', '<KP_Decimal>', '<KP_Divide>', '<KP_Multiply>']
-                    
-                    for key in admin_keys:
-                        try:
-                            # Get current binding
-                            current_binding = parent.bind(key)
-                            if current_binding:
-                                parent_bindings_backup[key] = current_binding
-                            # Unbind the key
-                            parent.unbind(key)
-                        except:
-                            pass
-                    
-                    # Remove grab from parent
-                    try:
-                        parent.grab_release()
-                    except:
-                        pass
-                    
-                    logger.debug(f"🎯 ULTRA: Disabled {len(parent_bindings_backup)} parent bindings")
-            except Exception as e:
-                logger.debug(f"Parent binding disable error: {e}")
-        
-        def restore_parent_bindings():
-            """🎯 ULTRA: Restore parent window bindings"""
-            try:
-                if hasattr(parent, 'winfo_exists') and parent.winfo_exists():
-                    # Restore all backed up bindings
-                    for key, binding in parent_bindings_backup.items():
-                        try:
-                            parent.bind(key, binding)
-                        except:
-                            pass
-                    
-                    logger.debug(f"🎯 ULTRA: Restored {len(parent_bindings_backup)} parent bindings")
-            except Exception as e:
-                logger.debug(f"Parent binding restore error: {e}")
-        
-        # Disable parent bindings IMMEDIATELY
-        disable_parent_bindings()
-        
-        # 🎯 ULTRA FOCUS SETUP - STAGE 2: ABSOLUTE DIALOG CONTROL
+        # 🎯 ULTRA FOCUS SETUP: grab_set đã chuyển toàn bộ phím về dialog,
+        # không cần gỡ/khôi phục binding của parent
         dialog.grab_set()  # Exclusive grab FIRST
         dialog.lift()
         dialog.focus_force()
@@ -557,8 +703,9 @@ class EnhancedMessageBox:
         
         # Better centering
         dialog.update_idletasks()
-        x = (dialog.winfo_screenwidth() // 2) - 375
-        y = (dialog.winfo_screenheight() // 2) - 250
+        sw, sh = _screen_size(dialog)
+        x = (sw // 2) - 375
+        y = (sh // 2) - 250
         dialog.geometry(f'750x500+{x}+{y}')
         
         result = [None]
@@ -579,14 +726,14 @@ class EnhancedMessageBox:
         header.pack(fill=tk.X)
         header.pack_propagate(False)
         
-        tk.Label(header, text=title, font=('Arial', 24, 'bold'),
+        tk.Label(header, text=title, font=get_font('Arial', 24, 'bold'),
                 fg='white', bg=color).pack(expand=True)
         
         # Message
         msg_frame = tk.Frame(dialog, bg=Colors.CARD_BG)
         msg_frame.pack(fill=tk.BOTH, expand=True, padx=25, pady=25)
         
-        tk.Label(msg_frame, text=message, font=('Arial', 16),
+        tk.Label(msg_frame, text=message, font=get_font('Arial', 16),
                 fg=Colors.TEXT_PRIMARY, bg=Colors.CARD_BG, 
                 wraplength=700, justify=tk.LEFT).pack(expand=True)
         
@@ -613,41 +760,38 @@ class EnhancedMessageBox:
             def ultra_restore_parent_focus():
                 try:
                     if parent and hasattr(parent, 'winfo_exists') and parent.winfo_exists():
-                        # STEP 1: Restore parent bindings FIRST
-                        restore_parent_bindings()
-                        
-                        # STEP 2: Give parent exclusive control
+                        # STEP 1: Give parent exclusive control
                         parent.lift()
                         parent.attributes('-topmost', True)
                         parent.focus_force()
-                        parent.focus_set()
-                        parent.focus()
                         
-                        # STEP 3: Re-establish parent grab
+                        # STEP 2: Re-establish parent grab
                         try:
                             parent.grab_set()
                         except:
                             pass
                         
-                        # STEP 4: Remove topmost after stable focus
-                        parent.after(150, lambda: parent.attributes('-topmost', False))
+                        # STEP 3: Remove topmost after stable focus
+                        parent.after_idle(parent.attributes, '-topmost', False)
                         
                         logger.debug("🎯 ULTRA: Perfect parent focus restored completely")
                 except Exception as e:
                     logger.debug(f"Ultra parent focus restoration error: {e}")
             
-            # 🎯 MULTIPLE ULTRA RESTORATION ATTEMPTS
+            # 🎯 1 lần khôi phục khi Tk rảnh (dialog đã hủy xong)
             if parent:
-                parent.after(50, ultra_restore_parent_focus)
-                parent.after(200, ultra_restore_parent_focus)
-                parent.after(500, ultra_restore_parent_focus)
-                parent.after(1000, ultra_restore_parent_focus)  # Final guarantee
+                parent.after_idle(ultra_restore_parent_focus)
             
             dialog.destroy()
+            
+            if on_close is not None:
+                on_close(text)
         
+        btn_bg = []  # màu gốc từng nút, dùng lại khi bỏ chọn
         for i, btn_text in enumerate(buttons):
             bg_color = btn_colors[i] if i < len(btn_colors) else Colors.PRIMARY
-            btn = tk.Button(btn_frame, text=btn_text, font=('Arial', 18, 'bold'),
+            btn_bg.append(bg_color)
+            btn = tk.Button(btn_frame, text=btn_text, font=get_font('Arial', 18, 'bold'),
                           bg=bg_color, fg='white', width=12, height=2,
                           relief=tk.RAISED, bd=5,
                           command=lambda t=btn_text: close_dialog_ultra(t))
@@ -655,14 +799,16 @@ class EnhancedMessageBox:
             btn_widgets.append(btn)
         
         # 🎯 ULTRA NAVIGATION FUNCTIONS
+        highlighted = [None]
+        
         def select_button_ultra(idx):
-            """🎯 ULTRA: Button selection với visual feedback"""
-            for j, btn in enumerate(btn_widgets):
-                if j == idx:
-                    btn.config(relief=tk.SUNKEN, bd=7, bg="#4CAF50")  # Enhanced visual
-                else:
-                    original_color = btn_colors[j] if j < len(btn_colors) else Colors.PRIMARY
-                    btn.config(relief=tk.RAISED, bd=5, bg=original_color)
+            """🎯 ULTRA: Button selection với visual feedback (chỉ đổi nút cũ + nút mới)"""
+            prev = highlighted[0]
+            if prev is not None and prev != idx:
+                btn_widgets[prev].config(relief=tk.RAISED, bd=5, bg=btn_bg[prev])
+            if prev != idx:
+                btn_widgets[idx].config(relief=tk.SUNKEN, bd=7, bg="#4CAF50")  # Enhanced visual
+                highlighted[0] = idx
             selected[0] = idx
         
         def navigate_buttons_ultra(direction):
@@ -686,89 +832,86 @@ class EnhancedMessageBox:
         
         # 🎯 ULTRA ENHANCED BINDINGS - EXCLUSIVE TO DIALOG
         def setup_ultra_bindings():
-            """🎯 ULTRA: Setup exclusive dialog bindings"""
+            """🎯 ULTRA: Setup exclusive dialog bindings (1 handler <Key> + dispatch)"""
+            keymap = {}
+            
             # Number keys for button selection
             for i in range(len(buttons)):
-                dialog.bind(str(i+1), lambda e, idx=i: btn_widgets[idx].invoke() if dialog_active[0] else None)
-                dialog.bind(f'<KP_{i+1}>', lambda e, idx=i: btn_widgets[idx].invoke() if dialog_active[0] else None)
+                invoke = lambda idx=i: btn_widgets[idx].invoke() if dialog_active[0] else None
+                keymap[str(i+1)] = keymap[f'KP_{i+1}'] = invoke
             
-            # Navigation keys
-            dialog.bind('<Left>', lambda e: navigate_buttons_ultra(-1))
-            dialog.bind('<Right>', lambda e: navigate_buttons_ultra(1))
-            dialog.bind('<Tab>', lambda e: navigate_buttons_ultra(1))
-            dialog.bind('<Shift-Tab>', lambda e: navigate_buttons_ultra(-1))
+            # Navigation keys (Shift-Tab: ISO_Left_Tab trên X11)
+            keymap['Left'] = keymap['ISO_Left_Tab'] = lambda: navigate_buttons_ultra(-1)
+            keymap['Right'] = lambda: navigate_buttons_ultra(1)
             
             # Activation keys
-            dialog.bind('<Return>', lambda e: activate_selected_ultra())
-            dialog.bind('<KP_Enter>', lambda e: activate_selected_ultra())
-            dialog.bind('<KP_Add>', lambda e: activate_selected_ultra())
-            dialog.bind('<space>', lambda e: activate_selected_ultra())
+            for keysym in ('Return', 'KP_Enter', 'KP_Add', 'space'):
+                keymap[keysym] = activate_selected_ultra
             
             # Exit keys
-            dialog.bind('<period>', lambda e: close_dialog_ultra(None))
-            dialog.bind('<KP_Decimal>', lambda e: close_dialog_ultra(None))
-            dialog.bind('<Escape>', lambda e: close_dialog_ultra(None))
-            dialog.bind('<KP_Divide>', lambda e: close_dialog_ultra(None))
-            dialog.bind('<KP_Multiply>', lambda e: close_dialog_ultra(None))
+            for keysym in ('period', 'KP_Decimal', 'Escape', 'KP_Divide', 'KP_Multiply'):
+                keymap[keysym] = lambda: close_dialog_ultra(None)
+            
+            def on_key(event):
+                if event.keysym == 'Tab':
+                    navigate_buttons_ultra(-1 if event.state & 0x1 else 1)
+                    return "break"
+                handler = keymap.get(event.keysym)
+                if handler is not None:
+                    handler()
+                    return "break"
+            
+            dialog.bind('<Key>', on_key)
             
             logger.debug("🎯 ULTRA: Exclusive dialog bindings configured")
         
         setup_ultra_bindings()
         select_button_ultra(0)
         
-        # 🎯 ULTRA FOCUS MAINTENANCE SYSTEM
-        focus_maintenance_active = [True]
-        
-        def ultra_focus_maintenance():
-            """🎯 ULTRA: Continuous focus maintenance"""
-            if not dialog_active[0] or not focus_maintenance_active[0]:
-                return
-            
-            try:
-                if dialog.winfo_exists():
-                    current_focus = dialog.focus_get()
-                    if current_focus != dialog and current_focus not in btn_widgets:
-                        # Force focus back to dialog
-                        dialog.focus_force()
-                        dialog.lift()
-                        logger.debug("🎯 ULTRA: Focus maintenance - restored dialog focus")
-                    
-                    # Schedule next maintenance check
-                    dialog.after(500, ultra_focus_maintenance)
-            except:
-                focus_maintenance_active[0] = False
-        
         # 🎯 ULTRA INITIAL FOCUS SEQUENCE
         def ultra_initial_focus():
             """🎯 ULTRA: Initial focus establishment"""
             try:
-                dialog.focus_set()
                 dialog.focus_force()
                 dialog.lift()
                 dialog.grab_set()  # Re-grab to ensure exclusivity
                 
-                # Start focus maintenance
-                ultra_focus_maintenance()
-                
                 logger.debug("🎯 ULTRA: Initial focus sequence completed")
             except Exception as e:
                 logger.debug(f"Ultra initial focus error: {e}")
         
-        # Multiple initial focus attempts with perfect timing
-        dialog.after(50, ultra_initial_focus)
-        dialog.after(150, ultra_initial_focus)
-        dialog.after(300, ultra_initial_focus)
-        dialog.after(500, ultra_initial_focus)
+        # 1 lần sau khi map; mất focus sau đó thì <FocusOut> đưa focus về
+        # (thay cho vòng kiểm tra focus 500ms trước đây)
+        dialog.after_idle(ultra_initial_focus)
+        
+        def on_focus_out(event):
+            if event.widget is dialog and dialog_active[0]:
+                dialog.after_idle(refocus_if_lost)
+        
+        def refocus_if_lost():
+            try:
+                if dialog_active[0] and dialog.winfo_exists():
+                    current = dialog.focus_get()
+                    if current is None or current.winfo_toplevel() is not dialog:
+                        dialog.lift()
+                        dialog.focus_force()
+            except:
+                pass
+        
+        dialog.bind('<FocusOut>', on_focus_out)
         
         # Enhanced close handler
         def on_dialog_close():
             """🎯 ULTRA: Handle dialog close properly"""
             if dialog_active[0]:
-                focus_maintenance_active[0] = False
                 close_dialog_ultra(None)
         
         dialog.protocol("WM_DELETE_WINDOW", on_dialog_close)
         
+        # Chế độ không chặn: kết quả trả qua on_close
+        if on_close is not None:
+            return None
+        
         dialog.wait_window()
         return result[0]
 
@@ -777,13 +920,23 @@ class AdminDataManager:
     def __init__(self, data_path: str):
         self.data_path = data_path
         self.admin_file = os.path.join(data_path, "admin_data.json")
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer = None
+        # Ghi nền thất bại: save_failed=True, gọi on_save_error() (từ thread timer) để UI báo lỗi
+        self.save_failed = False
+        self.on_save_error = None
         self.data = self._load_data()
+        # UID giữ dạng bytes (list theo thứ tự + set để kiểm tra O(1)); JSON lưu dạng hex
+        # (_load_data đã lọc bỏ chuỗi hex không hợp lệ)
+        self._uids = [bytes.fromhex(h) for h in self.data["valid_rfid_uids"]]
+        self._uid_set = set(self._uids)
         logger.info(f"  AdminDataManager khởi tạo - Mode: {self.get_authentication_mode()}")
     
     def _load_data(self):
         default_data = {
             "system_passcode": "1234",
-            "valid_rfid_uids": [[0x1b, 0x93, 0xf2, 0x3c]],
+            "valid_rfid_uids": ["1b93f23c"],
             "fingerprint_ids": [1, 2, 3],
             "authentication_mode": "sequential",
             "mode_change_history": [],
@@ -793,12 +946,20 @@ class AdminDataManager:
         
         try:
             if os.path.exists(self.admin_file):
-                with open(self.admin_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.admin_file, 'rb') as f:
+                    data = _LOADS(f.read())
                     for key, value in default_data.items():
                         if key not in data:
                             data[key] = value
                             logger.info(f"Added missing key: {key} = {value}")
+                    # Chấp nhận định dạng cũ [[0x1b, ...], ...] -> chuỗi hex; UID hỏng thì bỏ qua
+                    uids = []
+                    for u in data["valid_rfid_uids"]:
+                        try:
+                            uids.append((bytes.fromhex(u) if isinstance(u, str) else bytes(u)).hex())
+                        except (ValueError, TypeError):
+                            logger.warning(f"⚠️ Bỏ qua RFID UID không hợp lệ trong admin_data.json: {u!r}")
+                    data["valid_rfid_uids"] = uids
                     return data
             else:
                 os.makedirs(os.path.dirname(self.admin_file), exist_ok=True)
@@ -810,45 +971,108 @@ class AdminDataManager:
             return default_data
     
     def _save_data(self, data=None):
+        """Ghi ngay xuống file (atomic: ghi .tmp rồi os.replace)"""
         try:
             if data is None:
                 data = self.data
-            with open(self.admin_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            tmp_file = self.admin_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(_DUMPS(data))
+            os.replace(tmp_file, self.admin_file)
             return True
         except Exception as e:
             logger.error(f"Lỗi save admin data: {e}")
             return False
     
+    def _schedule_save(self):
+        """Đánh dấu dirty, gộp các thay đổi liên tiếp thành 1 lần ghi sau 0.5s.
+        
+        Trả về True = thay đổi đã nhận và xếp lịch ghi (chưa chắc đã ghi xong);
+        lỗi ghi sau đó báo qua save_failed / on_save_error.
+        """
+        with self._save_lock:
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(0.5, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return True
+    
+    def _flush(self):
+        with self._save_lock:
+            self._flush_timer = None
+            if not self._dirty:
+                return not self.save_failed
+            self._dirty = False
+            if self._save_data():
+                self.save_failed = False
+                return True
+            # Giữ dirty để lần thay đổi sau / close() ghi lại
+            self._dirty = True
+            self.save_failed = True
+        
+        if self.on_save_error:
+            try:
+                self.on_save_error()
+            except Exception as e:
+                logger.debug(f"on_save_error callback error: {e}")
+        return False
+    
+    def close(self):
+        """Hủy timer và ghi ngay các thay đổi còn chờ (gọi khi tắt hệ thống)"""
+        with self._save_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+        return self._flush()
+    
     # Data access methods
     def get_passcode(self): return self.data["system_passcode"]
     def set_passcode(self, new_passcode): 
         self.data["system_passcode"] = new_passcode
-        return self._save_data()
-    
-    def get_rfid_uids(self): return self.data["valid_rfid_uids"].copy()
+        return self._schedule_save()
+    
+    def get_rfid_uids(self): return list(self._uids)
+    @property
+    def rfid_count(self): return len(self._uids)
+    @property
+    def fp_count(self): return len(self.data["fingerprint_ids"])
+    def has_rfid(self, uid_list): return bytes(uid_list) in self._uid_set
     def add_rfid(self, uid_list):
-        if uid_list not in self.data["valid_rfid_uids"]:
-            self.data["valid_rfid_uids"].append(uid_list)
-            return self._save_data()
-        return False
+        uid = bytes(uid_list)
+        if uid in self._uid_set:
+            return False
+        self._uid_set.add(uid)
+        self._uids.append(uid)
+        self.data["valid_rfid_uids"].append(uid.hex())
+        return self._schedule_save()
     def remove_rfid(self, uid_list):
-        if uid_list in self.data["valid_rfid_uids"]:
-            self.data["valid_rfid_uids"].remove(uid_list)
-            return self._save_data()
-        return False
+        uid = bytes(uid_list)
+        if uid not in self._uid_set:
+            return False
+        self._uid_set.discard(uid)
+        self._uids.remove(uid)
+        self.data["valid_rfid_uids"].remove(uid.hex())
+        return self._schedule_save()
     
     def get_fingerprint_ids(self): return self.data["fingerprint_ids"].copy()
     def add_fingerprint_id(self, fp_id):
         if fp_id not in self.data["fingerprint_ids"]:
             self.data["fingerprint_ids"].append(fp_id)
-            return self._save_data()
+            return self._schedule_save()
         return False
     def remove_fingerprint_id(self, fp_id):
         if fp_id in self.data["fingerprint_ids"]:
             self.data["fingerprint_ids"].remove(fp_id)
-            return self._save_data()
+            return self._schedule_save()
         return False
+    def next_free_fingerprint_id(self, extra_used=()):
+        """Vị trí vân tay trống nhỏ nhất (1..199) theo dữ liệu đã lưu, None nếu đầy"""
+        used = set(self.data["fingerprint_ids"])
+        used.update(extra_used)
+        for fp_id in range(1, 200):
+            if fp_id not in used:
+                return fp_id
+        return None
     
     def get_authentication_mode(self): return self.data.get("authentication_mode", "sequential")
     def set_authentication_mode(self, mode):
@@ -877,7 +1101,7 @@ class AdminDataManager:
         if len(self.data["mode_change_history"]) > 50:
             self.data["mode_change_history"] = self.data["mode_change_history"][-50:]
         
-        success = self._save_data()
+        success = self._schedule_save()
         if success:
             logger.info(f"  Authentication mode changed: {old_mode} → {mode}")
         else:
@@ -895,14 +1119,14 @@ class AdminDataManager:
     
     def set_speaker_enabled(self, enabled):
         self.data["speaker_enabled"] = enabled
-        return self._save_data()
+        return self._schedule_save()
     
     def get_speaker_volume(self):
         return self.data.get("speaker_volume", 0.8)
     
     def set_speaker_volume(self, volume):
         self.data["speaker_volume"] = max(0.0, min(1.0, volume))
-        return self._save_data()
+        return self._schedule_save()
 
 # ==== SIMPLIFIED ENROLLMENT DIALOG ====
 class ThreadSafeEnrollmentDialog:
@@ -933,8 +1157,9 @@ class ThreadSafeEnrollmentDialog:
         
         # Better centering
         self.dialog.update_idletasks()
-        x = (self.dialog.winfo_screenwidth() // 2) - 250
-        y = (self.dialog.winfo_screenheight() // 2) - 200
+        sw, sh = _screen_size(self.dialog)
+        x = (sw // 2) - 250
+        y = (sh // 2) - 200
         self.dialog.geometry(f'500x400+{x}+{y}')
         
         self._create_widgets()
@@ -942,11 +1167,8 @@ class ThreadSafeEnrollmentDialog:
         # Protocol handler
         self.dialog.protocol("WM_DELETE_WINDOW", self._on_cancel)
         
-        # 🎯 PERFECT FOCUS MAINTENANCE
-        self.dialog.after(50, self._ensure_focus)
-        self.dialog.after(150, self._ensure_focus)
-        self.dialog.after(300, self._ensure_focus)
-        self.dialog.after(500, self._ensure_focus)
+        # 🎯 1 lần khi Tk rảnh thay vì 4 mốc 50/150/300/500ms
+        self.dialog.after_idle(self._ensure_focus)
     
     def _ensure_focus(self):
         """🎯 PERFECT FOCUS: Keep dialog focused"""
@@ -954,7 +1176,6 @@ class ThreadSafeEnrollmentDialog:
             if self.dialog and self.dialog.winfo_exists() and not self.cancelled:
                 self.dialog.lift()
                 self.dialog.focus_force()
-                self.dialog.focus_set()
         except:
             pass
     
@@ -965,26 +1186,26 @@ class ThreadSafeEnrollmentDialog:
         header.pack_propagate(False)
         
         tk.Label(header, text="👆 ĐĂNG KÝ VÂN TAY",
-                font=('Arial', 18, 'bold'), fg='white', bg="#1B5E20").pack(expand=True)
+                font=get_font('Arial', 18, 'bold'), fg='white', bg="#1B5E20").pack(expand=True)
         
         # Content
         content = tk.Frame(self.dialog, bg=Colors.CARD_BG)
         content.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
         self.status_label = tk.Label(content, text="KHỞI TẠO",
-                                   font=('Arial', 16, 'bold'),
+                                   font=get_font('Arial', 16, 'bold'),
                                    fg=Colors.PRIMARY, bg=Colors.CARD_BG)
         self.status_label.pack(pady=(20, 10))
         
         self.progress_label = tk.Label(content, text="Đang chuẩn bị...",
-                                     font=('Arial', 12),
+                                     font=get_font('Arial', 12),
                                      fg=Colors.TEXT_PRIMARY, bg=Colors.CARD_BG,
                                      wraplength=400, justify=tk.CENTER)
         self.progress_label.pack(pady=10, expand=True)
         
         # Cancel button
         cancel_btn = tk.Button(content, text="HỦY BỎ",
-                             font=('Arial', 12, 'bold'),
+                             font=get_font('Arial', 12, 'bold'),
                              bg=Colors.ERROR, fg='white',
                              width=15, height=2,
                              command=self._on_cancel)
@@ -999,7 +1220,8 @@ class ThreadSafeEnrollmentDialog:
                 simplified_message = self._simplify_message(message)
                 self.progress_label.config(text=simplified_message)
                 
-                self.dialog.update()
+                # Vẽ lại ngay trước các lệnh UART (convert/store) chặn ngắn
+                self.dialog.update_idletasks()
                 
                 if self.speaker:
                     if "BƯỚC 1" in status:
@@ -1047,9 +1269,7 @@ class ThreadSafeEnrollmentDialog:
         
         # 🎯 PERFECT PARENT FOCUS RESTORATION
         if self.parent:
-            self.parent.after(50, lambda: self._restore_parent_focus_perfect())
-            self.parent.after(200, lambda: self._restore_parent_focus_perfect())
-            self.parent.after(500, lambda: self._restore_parent_focus_perfect())
+            self.parent.after_idle(self._restore_parent_focus_perfect)
         
         try:
             if self.dialog:
@@ -1060,9 +1280,7 @@ class ThreadSafeEnrollmentDialog:
     def close(self):
         # 🎯 PERFECT PARENT FOCUS RESTORATION
         if self.parent:
-            self.parent.after(50, lambda: self._restore_parent_focus_perfect())
-            self.parent.after(200, lambda: self._restore_parent_focus_perfect())
-            self.parent.after(500, lambda: self._restore_parent_focus_perfect())
+            self.parent.after_idle(self._restore_parent_focus_perfect)
         
         try:
             if self.dialog:
@@ -1077,8 +1295,6 @@ class ThreadSafeEnrollmentDialog:
                 self.parent.lift()
                 self.parent.attributes('-topmost', True)
                 self.parent.focus_force()
-                self.parent.focus_set()
-                self.parent.focus()
                 
                 if hasattr(self.parent, 'grab_set'):
                     try:
@@ -1086,7 +1302,7 @@ class ThreadSafeEnrollmentDialog:
                     except:
                         pass
                 
-                self.parent.after(100, lambda: self.parent.attributes('-topmost', False))
+                self.parent.after_idle(self.parent.attributes, '-topmost', False)
                 
                 logger.debug("🎯 Perfect parent focus restored from enrollment")
         except Exception as e:
@@ -1103,6 +1319,18 @@ class ImprovedAdminGUI:
         self.fp_manager = ThreadSafeFingerprintManager(system.fingerprint)
         self.focus_maintenance_active = False
         self.dialog_in_progress = False
+        self._focus_pending = False
+        self._enroll_ctx = None
+        self._rfid_cancel = None
+        self._rfid_future = None
+        
+        # Ghi admin data chạy nền (debounce) - lỗi ghi báo lại lên admin window
+        system.admin_data.on_save_error = lambda: self._post_to_admin(self._show_save_error)
+        
+        # 1 worker thread cho lệnh UART dài của cảm biến vân tay - tuần tự 1 việc/lần
+        self._fp_jobs = queue.Queue()
+        self._fp_worker = threading.Thread(target=self._fp_loop, name='fp-sensor', daemon=True)
+        self._fp_worker.start()
         
         # 🛡️ BACKGROUND AUTHENTICATION CONTROL
         self.background_auth_paused = False
@@ -1150,19 +1378,18 @@ class ImprovedAdminGUI:
         
         # Better centering
         self.admin_window.update_idletasks()
-        x = (self.admin_window.winfo_screenwidth() // 2) - 475
-        y = (self.admin_window.winfo_screenheight() // 2) - 350
+        sw, sh = _screen_size(self.admin_window)
+        x = (sw // 2) - 475
+        y = (sh // 2) - 350
         self.admin_window.geometry(f'950x700+{x}+{y}')
         
         self._create_widgets()
         self._setup_bindings()
         self._update_selection()
         
-        # 🎯 PERFECT FOCUS ATTEMPTS
+        # 🎯 PERFECT FOCUS ATTEMPTS - lần 2 ngay khi Tk rảnh (cửa sổ đã map), không chờ timer cố định
         self._safe_focus_admin()
-        self.admin_window.after(100, self._safe_focus_admin)
-        self.admin_window.after(250, self._safe_focus_admin)
-        self.admin_window.after(500, self._safe_focus_admin)
+        self.admin_window.after_idle(self._safe_focus_admin)
         
         self._start_enhanced_focus_maintenance()
         
@@ -1299,10 +1526,34 @@ class ImprovedAdminGUI:
             try:
                 self.admin_window.lift()
                 self.admin_window.focus_force()
-                self.admin_window.focus_set()
             except Exception as e:
                 logger.debug(f"Safe focus error: {e}")
     
+    def _restore_admin_focus(self, delay=None):
+        """Lên lịch trả focus về admin window (mặc định after_idle) - gộp yêu cầu trùng, chỉ 1 callback chờ"""
+        if self._focus_pending or not (self.admin_window and self.admin_window.winfo_exists()):
+            return
+        self._focus_pending = True
+        if delay is None:
+            self.admin_window.after_idle(self._do_restore_admin_focus)
+        else:
+            self.admin_window.after(delay, self._do_restore_admin_focus)
+    
+    def _do_restore_admin_focus(self):
+        self._focus_pending = False
+        # Dialog khác đang mở thì không giành focus của nó
+        if self.dialog_in_progress:
+            return
+        try:
+            if self.admin_window and self.admin_window.winfo_exists():
+                self.admin_window.lift()
+                self.admin_window.attributes('-topmost', True)
+                self.admin_window.focus_force()
+                self.admin_window.grab_set()
+                self.admin_window.after_idle(self.admin_window.attributes, '-topmost', False)
+        except Exception as e:
+            logger.debug(f"Focus restoration error: {e}")
+    
     def _pause_focus_maintenance(self):
         """Pause focus maintenance for dialogs"""
         self.focus_maintenance_active = False
@@ -1325,7 +1576,7 @@ class ImprovedAdminGUI:
         header.pack_propagate(False)
         
         tk.Label(header, text="BẢNG ĐIỀU KHIỂN QUẢN TRỊ",
-                font=('Arial', 26, 'bold'), fg='white', bg=Colors.PRIMARY).pack(pady=(20, 5))
+                font=get_font('Arial', 26, 'bold'), fg='white', bg=Colors.PRIMARY).pack(pady=(20, 5))
         
         current_mode = self.system.admin_data.get_authentication_mode()
         mode_text = "TUẦN TỰ" if current_mode == "sequential" else "ĐƠN LẺ"
@@ -1336,31 +1587,21 @@ class ImprovedAdminGUI:
         auth_status = "TẠM DỪNG" if self.background_auth_paused else "HOẠT ĐỘNG"
         
         tk.Label(header, text=f"Chế độ: {mode_text} | Loa: {speaker_status} | Xác thực: {auth_status}",
-                font=('Arial', 13), fg='white', bg=Colors.PRIMARY).pack(pady=(0, 15))
+                font=get_font('Arial', 13), fg='white', bg=Colors.PRIMARY).pack(pady=(0, 15))
         
         # Menu frame
         menu_frame = tk.Frame(self.admin_window, bg=Colors.CARD_BG)
         menu_frame.pack(fill=tk.BOTH, expand=True, padx=30, pady=25)  
         
         self.buttons = []
+        self._prev_selected = None
         
-        colors = [
-            Colors.WARNING,    # 1 - Password
-            Colors.SUCCESS,    # 2 - Add RFID
-            Colors.ERROR,      # 3 - Remove RFID
-            "#2E7D32",         # 4 - Fingerprint
-            Colors.ACCENT,     # 5 - Remove Fingerprint
-            Colors.WARNING,    # 6 - Mode toggle
-            "#FF5722",         # 7 - Speaker settings
-            Colors.TEXT_SECONDARY  # 8 - Exit
-        ]
+        styles = _admin_button_styles(self.admin_window)
         
         for i, (num, text) in enumerate(self.options):
-            btn = tk.Button(menu_frame, 
+            btn = ttk.Button(menu_frame, 
                            text=f"{num}. {text}",
-                           font=('Arial', 17, 'bold'), height=2,
-                           bg=colors[i], fg='white', relief=tk.RAISED, bd=5,
-                           anchor='w',
+                           style=styles[i],
                            command=lambda idx=i: self._select_option(idx))
             
             btn.pack(fill=tk.X, pady=8, padx=25)
@@ -1372,32 +1613,28 @@ class ImprovedAdminGUI:
         footer.pack_propagate(False)
         
         tk.Label(footer, text="🛡️ Admin Mode: Xác thực nền đã tạm dừng | USB Numpad: 1-8=Chọn | Enter/+=OK | .=Thoát",
-                font=('Arial', 11), fg='lightgray', bg=Colors.DARK_BG).pack(expand=True)
+                font=get_font('Arial', 11), fg='lightgray', bg=Colors.DARK_BG).pack(expand=True)
 
     def _setup_bindings(self):
-        # Number keys 1-8
-        for i in range(len(self.options)):
-            self.admin_window.bind(str(i+1), lambda e, idx=i: self._select_option(idx))
-            self.admin_window.bind(f'<KP_{i+1}>', lambda e, idx=i: self._select_option(idx))
+        # 1 handler <Key> + bảng dispatch theo keysym (số 1-8 xử lý trong _on_key)
+        keymap = {}
         
         # Navigation
-        self.admin_window.bind('<Up>', lambda e: self._navigate(-1))
-        self.admin_window.bind('<Down>', lambda e: self._navigate(1))
-        self.admin_window.bind('<Tab>', lambda e: self._navigate(1))
-        self.admin_window.bind('<Shift-Tab>', lambda e: self._navigate(-1))
+        keymap['Up'] = lambda: self._navigate(-1)
+        keymap['Down'] = keymap['Tab'] = lambda: self._navigate(1)
+        keymap['ISO_Left_Tab'] = lambda: self._navigate(-1)  # Shift-Tab trên X11
         
         # Confirm keys
-        self.admin_window.bind('<Return>', lambda e: self._confirm())
-        self.admin_window.bind('<KP_Enter>', lambda e: self._confirm())
-        self.admin_window.bind('<KP_Add>', lambda e: self._confirm())
-        self.admin_window.bind('<space>', lambda e: self._confirm())
+        for keysym in ('Return', 'KP_Enter', 'KP_Add', 'space'):
+            keymap[keysym] = self._confirm
         
         # Exit keys
-        self.admin_window.bind('<Escape>', lambda e: self._close())
-        self.admin_window.bind('<period>', lambda e: self._close())
-        self.admin_window.bind('<KP_Decimal>', lambda e: self._close())
-        self.admin_window.bind('<KP_Divide>', lambda e: self._close())
-        self.admin_window.bind('<KP_Multiply>', lambda e: self._close())
+        keymap['Escape'] = self._on_escape
+        for keysym in ('period', 'KP_Decimal', 'KP_Divide', 'KP_Multiply'):
+            keymap[keysym] = self._close
+        
+        self._keymap = keymap
+        self.admin_window.bind('<Key>', self._on_key)
         
         self.admin_window.focus_set()
         logger.debug("  USB numpad bindings configured")
@@ -1406,6 +1643,23 @@ class ImprovedAdminGUI:
         self.selected = (self.selected + direction) % len(self.options)
         self._update_selection()
     
+    def _on_key(self, event):
+        ks = event.keysym
+        if ks == 'Tab' and event.state & 0x1:
+            ks = 'ISO_Left_Tab'
+        handler = self._keymap.get(ks)
+        if handler is not None:
+            handler()
+            return "break"
+        
+        if ks.startswith('KP_'):
+            ks = ks[3:]
+        if ks.isdigit():
+            idx = int(ks) - 1
+            if 0 <= idx < len(self.options):
+                self._select_option(idx)
+                return "break"
+    
     def _select_option(self, idx):
         if 0 <= idx < len(self.options):
             self.selected = idx
@@ -1413,19 +1667,16 @@ class ImprovedAdminGUI:
             self.admin_window.after(300, self._confirm)
     
     def _update_selection(self):
-        for i, btn in enumerate(self.buttons):
-            if i == self.selected:
-                btn.config(relief=tk.SUNKEN, bd=7)
-                if i == 6:  # Option 7 - Speaker
-                    btn.config(bg="#FF7043")
-                elif i == 3:  # Option 4 - Fingerprint
-                    btn.config(bg="#388E3C")
-            else:
-                btn.config(relief=tk.RAISED, bd=5)
-                if i == 6:
-                    btn.config(bg="#FF5722")
-                elif i == 3:
-                    btn.config(bg="#2E7D32")
+        # Chỉ cập nhật nút vừa bỏ chọn + nút vừa chọn
+        prev = self._prev_selected
+        if prev == self.selected:
+            return
+        
+        if prev is not None:
+            self.buttons[prev].state(['!selected'])
+        
+        self.buttons[self.selected].state(['selected'])
+        self._prev_selected = self.selected
     
     def _confirm(self):
         """Execute selected action"""
@@ -1690,252 +1941,330 @@ class ImprovedAdminGUI:
             logger.error(f"❌ Error resuming threads: {e}")
     
     def _run_complete_threadsafe_enrollment(self, user_id: str):
-        """Run thread-safe enrollment process với perfect focus"""
-        def complete_enrollment():
-            enrollment_dialog = None
-            try:
-                logger.info(f"🚀 Starting enrollment process for {user_id}")
-                
-                enrollment_dialog = ThreadSafeEnrollmentDialog(
-                    self.admin_window, 
-                    self.system.buzzer,
-                    getattr(self.system, 'speaker', None)
-                )
-                enrollment_dialog.show()
-                
-                if enrollment_dialog.cancelled:
-                    logger.info("  Enrollment cancelled by user at start")
-                    return
-                
-                enrollment_dialog.update_status("TÌM VỊ TRÍ", "Tìm vị trí lưu...")
-                
-                # 1. Find available position
-                position = self._find_threadsafe_fingerprint_position(user_id)
-                if not position:
-                    enrollment_dialog.update_status("LỖI", "Bộ nhớ vân tay đã đầy!")
-                    time.sleep(2)
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                logger.info(f"📍 Using position {position} for enrollment")
-                enrollment_dialog.update_status("VỊ TRÍ SẴN SÀNG", f"Sẽ lưu vào vị trí {position}")
-                time.sleep(1)
-                
-                # 2. Step 1: First fingerprint scan
-                enrollment_dialog.update_status("BƯỚC 1/2", "Đặt ngón tay lên cảm biến\nGiữ chắc, không di chuyển")
-                
-                if not self._threadsafe_fingerprint_scan(user_id, enrollment_dialog, "first", 1):
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # Convert first image
-                enrollment_dialog.update_status("XỬ LÝ 1", "Đang xử lý...")
-                try:
-                    self.system.fingerprint.convertImage(0x01)
-                    self.system.buzzer.beep("click")
-                    logger.debug("  First image converted successfully")
-                except Exception as e:
-                    enrollment_dialog.update_status("LỖI BƯỚC 1", f"Không thể xử lý ảnh:\n{str(e)}")
-                    time.sleep(3)
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # 3. Wait for finger removal
-                enrollment_dialog.update_status("NGHỈ", "Nhấc ngón tay ra\nChuẩn bị bước tiếp theo")
-                
-                if not self._threadsafe_wait_finger_removal(user_id, enrollment_dialog):
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # 4. Step 2: Second fingerprint scan
-                enrollment_dialog.update_status("BƯỚC 2/2", "Đặt ngón tay lần hai\nHơi khác góc độ")
-                
-                if not self._threadsafe_fingerprint_scan(user_id, enrollment_dialog, "second", 2):
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # Convert second image
-                enrollment_dialog.update_status("XỬ LÝ 2", "Đang xử lý...")
-                try:
-                    self.system.fingerprint.convertImage(0x02)
-                    self.system.buzzer.beep("click")
-                    logger.debug("  Second image converted successfully")
-                except Exception as e:
-                    enrollment_dialog.update_status("LỖI BƯỚC 2", f"Không thể xử lý ảnh:\n{str(e)}")
-                    time.sleep(3)
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # 5. Create and store template
-                enrollment_dialog.update_status("TẠO TEMPLATE", "Tạo template...")
-                
-                try:
-                    self.system.fingerprint.createTemplate()
-                    time.sleep(0.5)
-                    
-                    enrollment_dialog.update_status("LƯU TEMPLATE", f"Lưu dữ liệu...")
-                    self.system.fingerprint.storeTemplate(position, 0x01)
-                    
-                    logger.debug("  Template created and stored successfully")
-                except Exception as e:
-                    enrollment_dialog.update_status("LỖI TEMPLATE", f"Không thể tạo template:\n{str(e)}")
-                    time.sleep(3)
-                    return
-                
-                if enrollment_dialog.cancelled:
-                    return
-                
-                # 6. Update database
-                enrollment_dialog.update_status("CẬP NHẬT", "Cập nhật hệ thống...")
-                
-                if self.system.admin_data.add_fingerprint_id(position):
-                    total_fps = len(self.system.admin_data.get_fingerprint_ids())
-                    
-                    # Success!
-                    enrollment_dialog.update_status("THÀNH CÔNG  ", f"Đăng ký thành công!\nVị trí: {position}")
-                    time.sleep(2)
-                    
-                    logger.info(f"  Enrollment successful: ID {position}")
-                    
-                    # 🎯 PERFECT: Schedule success display với focus management
-                    self.admin_window.after(0, lambda: self._show_complete_enrollment_success_perfect(position, total_fps))
-                    
-                else:
-                    enrollment_dialog.update_status("LỖI DATABASE", "Không thể cập nhật cơ sở dữ liệu!")
-                    time.sleep(3)
-                
-            except Exception as e:
-                logger.error(f"❌ Enrollment process error: {e}")
-                if enrollment_dialog:
-                    enrollment_dialog.update_status("LỖI NGHIÊM TRỌNG", f"Lỗi hệ thống:\n{str(e)}")
-                    time.sleep(3)
-                
-            finally:
-                # Always close dialog
-                if enrollment_dialog:
-                    enrollment_dialog.close()
-                
-                # Always cleanup
-                self.admin_window.after(0, lambda: self._cleanup_complete_enrollment_process(user_id))
+        """Enrollment dạng state machine, tick từ Tk event loop; I/O cảm biến chạy trên thread _fp_jobs"""
+        logger.info(f"🚀 Starting enrollment process for {user_id}")
         
-        # Run enrollment in background thread
-        threading.Thread(target=complete_enrollment, daemon=True).start()
-    
-    def _threadsafe_fingerprint_scan(self, user_id: str, dialog, step: str, step_num: int):
-        """Thread-safe fingerprint scan"""
-        timeout = 25
-        start_time = time.time()
-        scan_attempts = 0
+        enrollment_dialog = ThreadSafeEnrollmentDialog(
+            self.admin_window, 
+            self.system.buzzer,
+            getattr(self.system, 'speaker', None)
+        )
+        enrollment_dialog.show()
+        self._enroll_ctx = {"user_id": user_id, "dialog": enrollment_dialog}
         
-        while time.time() - start_time < timeout:
-            if dialog.cancelled:
-                logger.info(f"  {step} scan cancelled by user")
-                return False
+        try:
+            enrollment_dialog.update_status("TÌM VỊ TRÍ", "Tìm vị trí lưu...")
             
-            if self.fp_manager.get_current_user() != user_id:
-                logger.error(f"❌ Lost sensor access during {step} scan")
-                dialog.update_status("MẤT QUYỀN TRUY CẬP", f"Mất quyền truy cập cảm biến!")
-                time.sleep(2)
-                return False
+            # 1. Find available position
+            position = self._find_threadsafe_fingerprint_position(user_id)
+            if not position:
+                enrollment_dialog.update_status("LỖI", "Bộ nhớ vân tay đã đầy!")
+                self._finish_enrollment(2000)
+                return
             
-            try:
-                if self.system.fingerprint.readImage():
-                    logger.debug(f"  {step} scan successful")
-                    dialog.update_status(f"BƯỚC {step_num}/2  ", f"Quét {step} thành công!")
-                    return True
-                
-                scan_attempts += 1
-                elapsed = int(time.time() - start_time)
-                remaining = timeout - elapsed
-                
-                if scan_attempts % 25 == 0:
-                    dialog.update_status(
-                        f"BƯỚC {step_num}/2", 
-                        f"Đang quét...\nCòn {remaining}s"
-                    )
-                
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"❌ Scan error during {step}: {e}")
-                dialog.update_status(f"LỖI QUÉT", f"Lỗi cảm biến:\n{str(e)}")
-                time.sleep(0.5)
+            logger.info(f"📍 Using position {position} for enrollment")
+            self._enroll_ctx["pos"] = position
+            
+            # 2. Step 1: First fingerprint scan
+            self._enroll_enter(
+                _EnrollState.WAIT_FIRST, 25,
+                "BƯỚC 1/2", "Đặt ngón tay lên cảm biến\nGiữ chắc, không di chuyển"
+            )
+        except Exception as e:
+            logger.exception(f"❌ Enrollment process error: {e}")
+            enrollment_dialog.update_status("LỖI NGHIÊM TRỌNG", f"Lỗi hệ thống:\n{str(e)}")
+            self._finish_enrollment(3000)
+    
+    def _enroll_enter(self, state, timeout, status, message):
+        """Chuyển sang trạng thái chờ ngón tay mới và bắt đầu tick"""
+        ctx = self._enroll_ctx
+        if ctx is None:
+            return
         
-        logger.warning(f"⏰ {step} scan timeout")
+        now = time.monotonic()
+        ctx["state"] = state
+        ctx["deadline"] = now + timeout
+        # Chờ đặt tay: cập nhật đếm ngược mỗi 2.5s; chờ nhấc tay: mỗi 0.3s
+        ctx["status_interval"] = 0.3 if state is _EnrollState.WAIT_RELEASE else 2.5
+        ctx["next_status"] = now + ctx["status_interval"]
+        ctx["dialog"].update_status(status, message)
+        self.admin_window.after(_FP_TICK_MS, self._enroll_tick)
+    
+    def _enroll_tick(self):
+        """Mỗi tick gửi 1 lần readImage() sang thread sensor, kết quả về _enroll_read"""
+        ctx = self._enroll_ctx
+        if ctx is None or not self._enroll_check(ctx):
+            return
+        
+        self._fp_jobs.put((
+            self._read_finger, (),
+            functools.partial(self._enroll_read, ctx),
+            functools.partial(self._enroll_read_failed, ctx)
+        ))
+    
+    def _read_finger(self):
+        return bool(self.system.fingerprint.readImage())
+    
+    def _enroll_check(self, ctx):
+        """Dừng enrollment nếu người dùng hủy hoặc mất quyền cảm biến (Tk thread)"""
+        dialog = ctx["dialog"]
+        state = ctx["state"]
+        
+        if dialog.cancelled:
+            logger.info(f"  Enrollment cancelled by user ({state.name})")
+            self._finish_enrollment()
+            return False
+        
+        if self.fp_manager.get_current_user() != ctx["user_id"]:
+            logger.error(f"❌ Lost sensor access during {state.name}")
+            dialog.update_status("MẤT QUYỀN TRUY CẬP", "Mất quyền truy cập cảm biến!")
+            self._finish_enrollment(2000)
+            return False
+        return True
+    
+    def _enroll_read_failed(self, ctx, e):
+        if self._enroll_ctx is not ctx:
+            return
+        if ctx["state"] is _EnrollState.WAIT_RELEASE:
+            logger.debug("  Finger removal detected via exception")
+            self._enroll_read(ctx, False)
+            return
+        
+        logger.error(f"❌ Scan error during {ctx['state'].name}: {e}")
+        # Cảm biến lỗi liên tục vẫn phải dừng khi hết thời gian bước quét
+        if time.monotonic() >= ctx["deadline"]:
+            self._enroll_timeout()
+            return
+        ctx["dialog"].update_status("LỖI QUÉT", f"Lỗi cảm biến:\n{str(e)}")
+        self.admin_window.after(500, self._enroll_tick)
+    
+    def _enroll_read(self, ctx, finger):
+        """Kết quả readImage() (Tk thread): chuyển trạng thái hoặc lên lịch tick tiếp"""
+        if self._enroll_ctx is not ctx:
+            return
+        try:
+            self._enroll_step(ctx, finger)
+        except Exception as e:
+            logger.exception(f"❌ Enrollment process error: {e}")
+            ctx["dialog"].update_status("LỖI NGHIÊM TRỌNG", f"Lỗi hệ thống:\n{str(e)}")
+            self._finish_enrollment(3000)
+    
+    def _enroll_step(self, ctx, finger):
+        dialog = ctx["dialog"]
+        state = ctx["state"]
+        
+        want_finger = state is not _EnrollState.WAIT_RELEASE
+        if finger == want_finger:
+            self._enroll_advance()
+            return
+        
+        now = time.monotonic()
+        if now >= ctx["deadline"]:
+            self._enroll_timeout()
+            return
+        
+        if now >= ctx["next_status"]:
+            ctx["next_status"] = now + ctx["status_interval"]
+            remaining = int(ctx["deadline"] - now)
+            if want_finger:
+                step_num = 1 if state is _EnrollState.WAIT_FIRST else 2
+                dialog.update_status(f"BƯỚC {step_num}/2", f"Đang quét...\nCòn {remaining}s")
+            else:
+                dialog.update_status("NGHỈ", f"Vui lòng nhấc ngón tay ra\nCòn {remaining}s")
+        
+        self.admin_window.after(_FP_TICK_MS, self._enroll_tick)
+    
+    def _enroll_advance(self):
+        """Xử lý khi đạt trạng thái chờ (đã đặt / đã nhấc ngón tay)"""
+        ctx = self._enroll_ctx
+        dialog = ctx["dialog"]
+        state = ctx["state"]
+        
+        if state is _EnrollState.WAIT_RELEASE:
+            logger.debug("  Finger removed successfully")
+            dialog.update_status("NGHỈ  ", "Đã nhấc ngón tay thành công")
+            ctx["state"] = _EnrollState.DONE  # Tạm dừng tick trong 1s nghỉ
+            self.admin_window.after(1000, self._enroll_enter,
+                _EnrollState.WAIT_SECOND, 25,
+                "BƯỚC 2/2", "Đặt ngón tay lần hai\nHơi khác góc độ"
+            )
+            return
+        
+        first = state is _EnrollState.WAIT_FIRST
+        step, step_num, buffer = ("first", 1, 0x01) if first else ("second", 2, 0x02)
+        logger.debug(f"  {step} scan successful")
+        dialog.update_status(f"BƯỚC {step_num}/2  ", f"Quét {step} thành công!")
+        
+        # Convert image - chạy trên thread sensor
+        dialog.update_status(f"XỬ LÝ {step_num}", "Đang xử lý...")
+        self._fp_jobs.put((
+            self.system.fingerprint.convertImage, (buffer,),
+            functools.partial(self._enroll_converted, ctx, step_num),
+            functools.partial(self._enroll_convert_failed, ctx, step_num)
+        ))
+    
+    def _enroll_convert_failed(self, ctx, step_num, e):
+        if self._enroll_ctx is not ctx:
+            return
+        ctx["dialog"].update_status(f"LỖI BƯỚC {step_num}", f"Không thể xử lý ảnh:\n{str(e)}")
+        self._finish_enrollment(3000)
+    
+    def _enroll_converted(self, ctx, step_num, _result=None):
+        """Kết quả convertImage() (Tk thread): chờ nhấc tay hoặc lưu template"""
+        if self._enroll_ctx is not ctx or not self._enroll_check(ctx):
+            return
+        self.system.buzzer.beep("click")
+        logger.debug(f"  Image {step_num} converted successfully")
+        
+        if step_num == 1:
+            # 3. Wait for finger removal
+            self._enroll_enter(
+                _EnrollState.WAIT_RELEASE, 12,
+                "NGHỈ", "Nhấc ngón tay ra\nChuẩn bị bước tiếp theo"
+            )
+        else:
+            self._enroll_store()
+    
+    def _enroll_timeout(self):
+        ctx = self._enroll_ctx
+        dialog = ctx["dialog"]
+        
+        if ctx["state"] is _EnrollState.WAIT_RELEASE:
+            logger.warning("⏰ Finger removal timeout - continuing")
+            dialog.update_status("NGHỈ ⚠️", "Timeout nhấc tay - tiếp tục...")
+            ctx["state"] = _EnrollState.DONE
+            self.admin_window.after(1000, self._enroll_enter,
+                _EnrollState.WAIT_SECOND, 25,
+                "BƯỚC 2/2", "Đặt ngón tay lần hai\nHơi khác góc độ"
+            )
+            return
+        
+        step_num = 1 if ctx["state"] is _EnrollState.WAIT_FIRST else 2
+        logger.warning(f"⏰ Step {step_num} scan timeout")
         dialog.update_status(f"HẾT THỜI GIAN", f"Hết thời gian quét bước {step_num}!")
-        time.sleep(3)
-        return False
+        self._finish_enrollment(3000)
+    
+    def _enroll_store(self):
+        """Tạo + lưu template trên thread sensor (không chặn Tk), sau đó cập nhật database"""
+        ctx = self._enroll_ctx
+        dialog = ctx["dialog"]
+        position = ctx["pos"]
+        ctx["state"] = _EnrollState.DONE
+        
+        # 5. Create and store template - chạy trên thread sensor, kết quả trả về Tk qua after_idle
+        dialog.update_status("TẠO TEMPLATE", "Tạo template...\nLưu dữ liệu...")
+        self._fp_jobs.put((
+            self._store_template, (position,),
+            functools.partial(self._enroll_stored, ctx),
+            functools.partial(self._enroll_store_failed, ctx)
+        ))
+    
+    def _store_template(self, position):
+        self.system.fingerprint.createTemplate()
+        self.system.fingerprint.storeTemplate(position, 0x01)
+    
+    def _fp_loop(self):
+        """Worker cảm biến: chạy tuần tự job (fn, args, on_ok, on_err), trả kết quả về Tk thread"""
+        while True:
+            fn, args, on_ok, on_err = self._fp_jobs.get()
+            try:
+                result = fn(*args)
+            except Exception as e:
+                logger.debug(f"Fingerprint job {fn.__name__} error: {e}")
+                if on_err:
+                    self._post_to_admin(on_err, e)
+            else:
+                if on_ok:
+                    self._post_to_admin(on_ok, result)
+    
+    def _show_save_error(self):
+        if not (self.admin_window and self.admin_window.winfo_exists()):
+            return
+        EnhancedMessageBox.show_error(
+            self.admin_window,
+            "Lỗi lưu dữ liệu",
+            "Không thể ghi admin_data.json!\nThay đổi vừa rồi chưa được lưu xuống thẻ nhớ.",
+            self.system.buzzer,
+            getattr(self.system, 'speaker', None)
+        )
+    
+    def _post_to_admin(self, fn, *args):
+        """Gọi fn(*args) trên Tk thread (dùng từ thread nền); bỏ qua nếu admin đã đóng"""
+        try:
+            self.admin_window.after_idle(fn, *args)
+        except (tk.TclError, RuntimeError, AttributeError):
+            pass
     
-    def _threadsafe_wait_finger_removal(self, user_id: str, dialog):
-        """Thread-safe finger removal wait"""
-        timeout = 12
-        start_time = time.time()
+    def _enroll_store_failed(self, ctx, e):
+        if self._enroll_ctx is not ctx:
+            return
+        ctx["dialog"].update_status("LỖI TEMPLATE", f"Không thể tạo template:\n{str(e)}")
+        self._finish_enrollment(3000)
+    
+    def _enroll_stored(self, ctx, _result=None):
+        """Kết quả tạo/lưu template (Tk thread): cập nhật database"""
+        if self._enroll_ctx is not ctx:
+            return
+        dialog = ctx["dialog"]
+        position = ctx["pos"]
         
-        while time.time() - start_time < timeout:
-            if dialog.cancelled:
-                return False
+        logger.debug("  Template created and stored successfully")
+        
+        # 6. Update database
+        dialog.update_status("CẬP NHẬT", "Cập nhật hệ thống...")
+        
+        if self.system.admin_data.add_fingerprint_id(position):
+            total_fps = self.system.admin_data.fp_count
             
-            if self.fp_manager.get_current_user() != user_id:
-                logger.error("❌ Lost sensor access during finger removal")
-                dialog.update_status("MẤT QUYỀN TRUY CẬP", "Mất quyền truy cập cảm biến!")
-                time.sleep(2)
-                return False
+            # Success!
+            dialog.update_status("THÀNH CÔNG  ", f"Đăng ký thành công!\nVị trí: {position}")
+            logger.info(f"  Enrollment successful: ID {position}")
             
-            try:
-                if not self.system.fingerprint.readImage():
-                    logger.debug("  Finger removed successfully")
-                    dialog.update_status("NGHỈ  ", "Đã nhấc ngón tay thành công")
-                    time.sleep(1)
-                    return True
-                
-                elapsed = int(time.time() - start_time)
-                remaining = timeout - elapsed
-                dialog.update_status("NGHỈ", f"Vui lòng nhấc ngón tay ra\nCòn {remaining}s")
-                
-                time.sleep(0.3)
-                
-            except:
-                logger.debug("  Finger removal detected via exception")
-                return True
+            self._finish_enrollment(
+                2000, lambda: self._show_complete_enrollment_success_perfect(position, total_fps)
+            )
+        else:
+            dialog.update_status("LỖI DATABASE", "Không thể cập nhật cơ sở dữ liệu!")
+            self._finish_enrollment(3000)
+    
+    def _finish_enrollment(self, delay_ms=0, on_done=None):
+        """Dừng state machine; sau delay_ms đóng dialog, cleanup rồi gọi on_done"""
+        ctx = self._enroll_ctx
+        if ctx is None:
+            return
+        self._enroll_ctx = None
         
-        logger.warning("⏰ Finger removal timeout - continuing")
-        dialog.update_status("NGHỈ ⚠️", "Timeout nhấc tay - tiếp tục...")
-        time.sleep(1)
-        return True
+        def finish():
+            # Always close dialog + cleanup
+            ctx["dialog"].close()
+            self._cleanup_complete_enrollment_process(ctx["user_id"])
+            if on_done:
+                on_done()
+        
+        self.admin_window.after(delay_ms, finish)
     
     def _find_threadsafe_fingerprint_position(self, user_id: str):
         """Thread-safe position finding"""
+        if self.fp_manager.get_current_user() != user_id:
+            logger.error("❌ No sensor access for position finding")
+            return None
+        
+        # Đối chiếu 1 lần với bảng index của sensor (1 lệnh UART thay vì loadTemplate từng vị trí)
+        # pyfingerprint báo lỗi sensor bằng Exception/ValueError thường, không có lớp lỗi riêng
+        sensor_used = ()
         try:
-            if self.fp_manager.get_current_user() != user_id:
-                logger.error("❌ No sensor access for position finding")
-                return None
-            
-            for i in range(1, 200):
-                try:
-                    self.system.fingerprint.loadTemplate(i, 0x01)
-                    continue
-                except:
-                    logger.debug(f"  Found available position {i}")
-                    return i
-            
+            index = self.system.fingerprint.getTemplateIndex(0)
+            sensor_used = [i for i, used in enumerate(index) if used]
+        except Exception as e:
+            logger.debug(f"getTemplateIndex không khả dụng, chỉ dùng admin data: {e}")
+        
+        position = self.system.admin_data.next_free_fingerprint_id(sensor_used)
+        if position is None:
             logger.warning("❌ No available fingerprint positions")
             return None
-            
-        except Exception as e:
-            logger.error(f"❌ Error finding position: {e}")
-            return 1
+        
+        logger.debug(f"  Found available position {position}")
+        return position
     
     def _show_complete_enrollment_success_perfect(self, position, total):
         """🎯 PERFECT: Show enrollment success với perfect focus management"""
@@ -1968,24 +2297,7 @@ class ImprovedAdminGUI:
             # Resume focus maintenance after dialog
             self._resume_focus_maintenance()
             
-            # 🎯 MULTIPLE ADMIN FOCUS RESTORATION ATTEMPTS
-            def restore_admin_focus_perfect():
-                if self.admin_window and self.admin_window.winfo_exists():
-                    self.admin_window.lift()
-                    self.admin_window.attributes('-topmost', True)
-                    self.admin_window.focus_force()
-                    self.admin_window.focus_set()
-                    self.admin_window.focus()
-                    self.admin_window.grab_set()
-                    
-                    self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                    logger.info("🎯 Perfect admin focus restored after enrollment success")
-            
-            # Multiple restoration attempts with perfect timing
-            self.admin_window.after(100, restore_admin_focus_perfect)
-            self.admin_window.after(300, restore_admin_focus_perfect)
-            self.admin_window.after(600, restore_admin_focus_perfect)
-            self.admin_window.after(1000, restore_admin_focus_perfect)
+            self._restore_admin_focus()
         
         # Run in main thread
         self.admin_window.after(0, show_success_with_perfect_focus)
@@ -2063,20 +2375,7 @@ class ImprovedAdminGUI:
         
         self._resume_focus_maintenance()
         
-        # 🎯 PERFECT ADMIN FOCUS RESTORATION
-        def restore_admin_focus_perfect():
-            if self.admin_window and self.admin_window.winfo_exists():
-                self.admin_window.lift()
-                self.admin_window.attributes('-topmost', True)
-                self.admin_window.focus_force()
-                self.admin_window.focus_set()
-                self.admin_window.focus()
-                self.admin_window.grab_set()
-                self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-        
-        self.admin_window.after(100, restore_admin_focus_perfect)
-        self.admin_window.after(300, restore_admin_focus_perfect)
-        self.admin_window.after(600, restore_admin_focus_perfect)
+        self._restore_admin_focus()
         
         if new_pass and 4 <= len(new_pass) <= 8:
             if self.system.admin_data.set_passcode(new_pass):
@@ -2090,9 +2389,7 @@ class ImprovedAdminGUI:
                         getattr(self.system, 'speaker', None)
                     )
                     self._resume_focus_maintenance()
-                    # Perfect focus restoration
-                    self.admin_window.after(100, restore_admin_focus_perfect)
-                    self.admin_window.after(300, restore_admin_focus_perfect)
+                    self._restore_admin_focus()
                 
                 self.admin_window.after(0, show_success_perfect)
                 logger.info("  Passcode changed via perfect focus method")
@@ -2107,9 +2404,7 @@ class ImprovedAdminGUI:
                         getattr(self.system, 'speaker', None)
                     )
                     self._resume_focus_maintenance()
-                    # Perfect focus restoration
-                    self.admin_window.after(100, restore_admin_focus_perfect)
-                    self.admin_window.after(300, restore_admin_focus_perfect)
+                    self._restore_admin_focus()
                 
                 self.admin_window.after(0, show_error_perfect)
         elif new_pass:
@@ -2123,9 +2418,7 @@ class ImprovedAdminGUI:
                     getattr(self.system, 'speaker', None)
                 )
                 self._resume_focus_maintenance()
-                # Perfect focus restoration
-                self.admin_window.after(100, restore_admin_focus_perfect)
-                self.admin_window.after(300, restore_admin_focus_perfect)
+                self._restore_admin_focus()
             
             self.admin_window.after(0, show_validation_error_perfect)
 
@@ -2145,60 +2438,67 @@ class ImprovedAdminGUI:
                 getattr(self.system, 'speaker', None)
             )
             
-            # Perfect focus restoration after info dialog
-            def restore_admin_focus_after_info():
-                if self.admin_window and self.admin_window.winfo_exists():
-                    self.admin_window.lift()
-                    self.admin_window.attributes('-topmost', True)
-                    self.admin_window.focus_force()
-                    self.admin_window.focus_set()
-                    self.admin_window.grab_set()
-                    self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                self._resume_focus_maintenance()
+            self._resume_focus_maintenance()
+            self._restore_admin_focus()
             
-            self.admin_window.after(100, restore_admin_focus_after_info)
-            self.admin_window.after(300, restore_admin_focus_after_info)
+            # Poll ngắn 0.2s để hủy được ngay (Escape / đóng admin) thay vì chặn 15s
+            cancel = threading.Event()
+            self._rfid_cancel = cancel
             
             def scan_rfid():
                 try:
-                    uid = self.system.pn532.read_passive_target(timeout=15)
+                    uid = None
+                    # Bind sẵn cho vòng poll (không tra thuộc tính/global mỗi lượt)
+                    monotonic, cancelled = time.monotonic, cancel.is_set
+                    read_target = self.system.pn532.read_passive_target
+                    deadline = monotonic() + 15
+                    while monotonic() < deadline and not cancelled():
+                        uid = read_target(timeout=0.2)
+                        if uid:
+                            break
+                    
+                    if cancel.is_set():
+                        logger.info("  RFID scan cancelled")
+                        return
                     
                     if uid:
                         uid_list = list(uid)
                         uid_display = f"[{', '.join([f'{x:02X}' for x in uid_list])}]"
                         
-                        existing_uids = self.system.admin_data.get_rfid_uids()
-                        if uid_list in existing_uids:
-                            self.admin_window.after(0, lambda: self._show_result_perfect(
+                        if self.system.admin_data.has_rfid(uid_list):
+                            self.admin_window.after(0, self._show_result_perfect,
                                 "error", "Thẻ đã tồn tại", f"Thẻ {uid_display} đã được đăng ký trong hệ thống."
-                            ))
+                            )
                             return
                         
                         if self.system.admin_data.add_rfid(uid_list):
-                            total_rfid = len(self.system.admin_data.get_rfid_uids())
-                            self.admin_window.after(0, lambda: self._show_result_perfect(
+                            total_rfid = self.system.admin_data.rfid_count
+                            self.admin_window.after(0, self._show_result_perfect,
                                 "success", "Thêm thành công", 
                                 f"  Đã thêm thẻ RFID thành công!\n\nUID: {uid_display}\nTổng thẻ: {total_rfid}"
-                            ))
+                            )
                             logger.info(f"  RFID added: {uid_list}")
                         else:
-                            self.admin_window.after(0, lambda: self._show_result_perfect(
+                            self.admin_window.after(0, self._show_result_perfect,
                                 "error", "Lỗi", "Không thể lưu thẻ vào cơ sở dữ liệu."
-                            ))
+                            )
                     else:
-                        self.admin_window.after(0, lambda: self._show_result_perfect(
+                        self.admin_window.after(0, self._show_result_perfect,
                             "error", "Không phát hiện thẻ", "Không phát hiện thẻ RFID nào trong 15 giây"
-                        ))
+                        )
                         
                 except Exception as e:
                     error_msg = f"Lỗi đọc RFID: {str(e)}"
-                    self.admin_window.after(0, lambda: self._show_result_perfect(
+                    self.admin_window.after(0, self._show_result_perfect,
                         "error", "Lỗi hệ thống", error_msg
-                    ))
+                    )
                     logger.error(f"❌ RFID scan error: {e}")
+                finally:
+                    if self._rfid_cancel is cancel:
+                        self._rfid_cancel = None
             
             # Start RFID scan in background
-            threading.Thread(target=scan_rfid, daemon=True).start()
+            self._rfid_future = _BG.submit(scan_rfid)
             
         except Exception as e:
             self._pause_focus_maintenance()
@@ -2212,6 +2512,25 @@ class ImprovedAdminGUI:
             self._resume_focus_maintenance()
             logger.error(f"Critical RFID add error: {e}")
 
+    def _cancel_rfid_scan(self):
+        """Hủy lượt quét RFID đang chạy (nếu có), trả về True nếu đã hủy"""
+        cancel = self._rfid_cancel
+        if cancel is None or cancel.is_set():
+            return False
+        cancel.set()
+        # Chưa kịp chạy (pool đang bận) thì bỏ luôn khỏi hàng đợi
+        if self._rfid_future is not None:
+            self._rfid_future.cancel()
+        return True
+    
+    def _on_escape(self):
+        # Escape khi đang quét thẻ chỉ hủy lượt quét, không thoát admin
+        if self._cancel_rfid_scan():
+            if self.system.buzzer:
+                self.system.buzzer.beep("click")
+            return
+        self._close()
+    
     def _show_result_perfect(self, msg_type, title, message):
         """🎯 PERFECT: Show result với perfect focus management"""
         def show_with_perfect_focus():
@@ -2238,39 +2557,14 @@ class ImprovedAdminGUI:
             # Resume focus maintenance
             self._resume_focus_maintenance()
             
-            # 🎯 PERFECT ADMIN FOCUS RESTORATION WITH GUARANTEED SUCCESS
-            def restore_admin_focus_guaranteed():
-                if self.admin_window and self.admin_window.winfo_exists():
-                    try:
-                        # ABSOLUTE focus restoration sequence
-                        self.admin_window.lift()
-                        self.admin_window.attributes('-topmost', True)
-                        self.admin_window.focus_force()
-                        self.admin_window.focus_set()
-                        self.admin_window.focus()
-                        self.admin_window.grab_set()
-                        
-                        # Remove topmost after stable focus
-                        self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                        
-                        logger.debug("🎯 Perfect admin focus guaranteed restoration")
-                    except Exception as e:
-                        logger.debug(f"Focus restoration error: {e}")
-            
-            # Multiple guaranteed restoration attempts
-            self.admin_window.after(50, restore_admin_focus_guaranteed)
-            self.admin_window.after(200, restore_admin_focus_guaranteed)
-            self.admin_window.after(500, restore_admin_focus_guaranteed)
-            self.admin_window.after(1000, restore_admin_focus_guaranteed)
-            self.admin_window.after(1500, restore_admin_focus_guaranteed)  # Extra guarantee
+            self._restore_admin_focus()
         
         # Show dialog in main thread
         self.admin_window.after(0, show_with_perfect_focus)
 
     def _remove_rfid(self):
         """🎯 PERFECT: RFID removal với perfect focus"""
-        uids = self.system.admin_data.get_rfid_uids()
-        if not uids:
+        if self.system.admin_data.rfid_count == 0:
             self._pause_focus_maintenance()
             EnhancedMessageBox.show_info(
                 self.admin_window, 
@@ -2282,7 +2576,8 @@ class ImprovedAdminGUI:
             self._resume_focus_maintenance()
             return
         
-        display_items = [f"Thẻ {i+1}: [{', '.join([f'{x:02X}' for x in uid])}]" for i, uid in enumerate(uids)]
+        uids = self.system.admin_data.get_rfid_uids()
+        display_items = (f"Thẻ {i+1}: [{', '.join([f'{x:02X}' for x in uid])}]" for i, uid in enumerate(uids))
         
         self._pause_focus_maintenance()
         
@@ -2290,13 +2585,13 @@ class ImprovedAdminGUI:
             "Chọn thẻ RFID cần xóa", 
             display_items, 
             lambda idx: self._do_remove_rfid_perfect(uids[idx]),
-            "RFID"
+            "RFID",
+            len(uids)
         )
 
     def _remove_fingerprint(self):
         """🎯 PERFECT: Fingerprint removal với perfect focus"""
-        fp_ids = self.system.admin_data.get_fingerprint_ids()
-        if not fp_ids:
+        if self.system.admin_data.fp_count == 0:
             self._pause_focus_maintenance()
             EnhancedMessageBox.show_info(
                 self.admin_window, 
@@ -2308,38 +2603,37 @@ class ImprovedAdminGUI:
             self._resume_focus_maintenance()
             return
         
-        display_items = [f"Vân tay ID: {fid} (Vị trí {fid})" for fid in sorted(fp_ids)]
+        fp_ids = sorted(self.system.admin_data.get_fingerprint_ids())
+        display_items = (f"Vân tay ID: {fid} (Vị trí {fid})" for fid in fp_ids)
         
         self._pause_focus_maintenance()
         
         self._show_selection_dialog_perfect(
             "Chọn vân tay cần xóa", 
             display_items, 
-            lambda idx: self._do_remove_fingerprint_perfect(sorted(fp_ids)[idx]),
-            "Fingerprint"
+            lambda idx: self._do_remove_fingerprint_perfect(fp_ids[idx]),
+            "Fingerprint",
+            len(fp_ids)
         )
 
-    def _show_selection_dialog_perfect(self, title, items, callback, item_type):
-        """🎯 PERFECT: Selection dialog với perfect focus support"""
-        if not items:
+    def _show_selection_dialog_perfect(self, title, items, callback, item_type, count=None):
+        """🎯 PERFECT: Selection dialog với perfect focus support (items có thể là generator nếu truyền count)"""
+        if count is None:
+            items = list(items)
+            count = len(items)
+        if not count:
             return
+        
+        # Hằng số dùng nhiều lần trong dialog -> biến local
+        DARK, ERR, CARD, SECND = Colors.DARK_BG, Colors.ERROR, Colors.CARD_BG, Colors.TEXT_SECONDARY
+        X, BOTH, RAISED, END = tk.X, tk.BOTH, tk.RAISED, tk.END
             
+        # Ẩn trong lúc dựng widget, tính layout 1 lần ở cuối rồi mới hiện
         sel_window = tk.Toplevel(self.admin_window)
+        sel_window.withdraw()
         sel_window.title(f"{title}")
-        sel_window.geometry("700x600")
-        sel_window.configure(bg=Colors.DARK_BG)
+        sel_window.configure(bg=DARK)
         sel_window.transient(self.admin_window)
-        sel_window.grab_set()
-        
-        # 🎯 PERFECT FOCUS FOR SELECTION DIALOG
-        sel_window.lift()
-        sel_window.focus_force()
-        sel_window.attributes('-topmost', True)
-        
-        sel_window.update_idletasks()
-        x = (sel_window.winfo_screenwidth() // 2) - 350
-        y = (sel_window.winfo_screenheight() // 2) - 300
-        sel_window.geometry(f'700x600+{x}+{y}')
         
         dialog_closed = {'value': False}
         
@@ -2358,156 +2652,118 @@ class ImprovedAdminGUI:
                 except:
                     pass
                 
-                # 🎯 PERFECT ADMIN FOCUS RESTORATION
-                def restore_admin_focus_from_selection():
-                    if self.admin_window and self.admin_window.winfo_exists():
-                        self.admin_window.lift()
-                        self.admin_window.attributes('-topmost', True)
-                        self.admin_window.focus_force()
-                        self.admin_window.focus_set()
-                        self.admin_window.grab_set()
-                        self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                
-                self.admin_window.after(100, restore_admin_focus_from_selection)
-                self.admin_window.after(300, restore_admin_focus_from_selection)
-                self.admin_window.after(600, restore_admin_focus_from_selection)
+                self._restore_admin_focus()
                 
                 self._resume_focus_maintenance()
         
         sel_window.protocol("WM_DELETE_WINDOW", close_selection_dialog_perfect)
         
         # Header
-        header = tk.Frame(sel_window, bg=Colors.ERROR, height=100)
-        header.pack(fill=tk.X)
+        header = tk.Frame(sel_window, bg=ERR, height=100)
+        header.pack(fill=X)
         header.pack_propagate(False)
         
-        tk.Label(header, text=title, font=('Arial', 20, 'bold'),
-                fg='white', bg=Colors.ERROR).pack(pady=(10, 2))
+        tk.Label(header, text=title, font=get_font('Arial', 20, 'bold'),
+                fg='white', bg=ERR).pack(pady=(10, 2))
         
-        tk.Label(header, text=f"USB Numpad: 1-{len(items)}=Chọn | .=Thoát",
-                font=('Arial', 12), fg='white', bg=Colors.ERROR).pack(pady=(0, 8))
+        tk.Label(header, text=f"USB Numpad: 1-{count}=Chọn | .=Thoát",
+                font=get_font('Arial', 12), fg='white', bg=ERR).pack(pady=(0, 8))
         
-        # Items list
-        list_frame = tk.Frame(sel_window, bg=Colors.CARD_BG)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        # Items list - 1 Listbox cho toàn bộ mục (thay vì 1 Button + Label mỗi mục)
+        list_frame = tk.Frame(sel_window, bg=CARD)
+        list_frame.pack(fill=BOTH, expand=True, padx=20, pady=20)
         
-        for i, item in enumerate(items):
-            btn_frame = tk.Frame(list_frame, bg=Colors.CARD_BG)
-            btn_frame.pack(fill=tk.X, pady=3, padx=10)
-            
-            num_label = tk.Label(btn_frame, text=f"{i+1}", 
-                               font=('Arial', 16, 'bold'), fg='white', bg=Colors.ERROR,
-                               width=3, relief=tk.RAISED, bd=3)
-            num_label.pack(side=tk.LEFT, padx=(0, 10))
-            
-            def make_selection_handler_perfect(idx):
-                def handle_selection_perfect():
-                    if not dialog_closed['value']:
-                        dialog_closed['value'] = True
-                        logger.info(f"Selection: {item_type} index {idx}")
-                        
-                        if hasattr(self.system, 'speaker') and self.system.speaker:
-                            self.system.speaker.speak("success", "Đã chọn")
-                        
-                        if self.system.buzzer:
-                            self.system.buzzer.beep("click")
-                        try:
-                            sel_window.destroy()
-                        except:
-                            pass
-                        callback(idx)
-                        
-                        # 🎯 PERFECT ADMIN FOCUS RESTORATION
-                        def restore_admin_focus_from_selection():
-                            if self.admin_window and self.admin_window.winfo_exists():
-                                self.admin_window.lift()
-                                self.admin_window.attributes('-topmost', True)
-                                self.admin_window.focus_force()
-                                self.admin_window.focus_set()
-                                self.admin_window.grab_set()
-                                self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                        
-                        self.admin_window.after(100, restore_admin_focus_from_selection)
-                        self.admin_window.after(300, restore_admin_focus_from_selection)
-                        self.admin_window.after(600, restore_admin_focus_from_selection)
-                        
-                        self._resume_focus_maintenance()
-                return handle_selection_perfect
-            
-            btn = tk.Button(btn_frame, text=item,
-                           font=('Arial', 14, 'bold'), height=2,
-                           bg=Colors.ERROR, fg='white', relief=tk.RAISED, bd=4,
-                           anchor='w',
-                           command=make_selection_handler_perfect(i))
-            btn.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        listbox = tk.Listbox(list_frame, font=get_font('Arial', 16, 'bold'),
+                             bg=ERR, fg='white',
+                             selectbackground=DARK, selectforeground='white',
+                             activestyle='dotbox', height=min(count, 10),
+                             relief=RAISED, bd=4, highlightthickness=0, takefocus=0)
+        listbox.insert(END, *(f"{i+1}. {item}" for i, item in enumerate(items)))
+        listbox.pack(fill=BOTH, expand=True, padx=10, pady=3)
+        listbox.selection_set(0)
+        listbox.activate(0)
+        sel_idx = tk.IntVar(sel_window, 0)
+        
+        def select_item_perfect(idx):
+            if not dialog_closed['value']:
+                dialog_closed['value'] = True
+                logger.info(f"Selection: {item_type} index {idx}")
+                
+                if hasattr(self.system, 'speaker') and self.system.speaker:
+                    self.system.speaker.speak("success", "Đã chọn")
+                
+                if self.system.buzzer:
+                    self.system.buzzer.beep("click")
+                try:
+                    sel_window.destroy()
+                except:
+                    pass
+                # callback mở hộp xác nhận không chặn; focus admin được trả lại
+                # trong _finish_* / _end_admin_dialog khi người dùng trả lời
+                callback(idx)
+        
+        def navigate_items(direction):
+            new = (sel_idx.get() + direction) % count
+            sel_idx.set(new)
+            listbox.selection_clear(0, END)
+            listbox.selection_set(new)
+            listbox.activate(new)
+            listbox.see(new)
+        
+        def activate_selected():
+            select_item_perfect(sel_idx.get())
+        
+        listbox.bind('<ButtonRelease-1>', lambda e: select_item_perfect(listbox.nearest(e.y)))
         
         # Cancel Button
-        cancel_frame = tk.Frame(sel_window, bg=Colors.DARK_BG)
+        cancel_frame = tk.Frame(sel_window, bg=DARK)
         cancel_frame.pack(pady=15)
         
         cancel_btn = tk.Button(cancel_frame, text="HỦY BỎ", 
-                             font=('Arial', 14, 'bold'),
-                             bg=Colors.TEXT_SECONDARY, fg='white', height=2, width=22,
-                             relief=tk.RAISED, bd=4,
+                             font=get_font('Arial', 14, 'bold'),
+                             bg=SECND, fg='white', height=2, width=22,
+                             relief=RAISED, bd=4,
                              command=close_selection_dialog_perfect)
         cancel_btn.pack(pady=5)
         
-        # Enhanced bindings
-        def setup_bindings_perfect():
-            exit_keys = ['<Escape>', '<period>', '<KP_Decimal>', '<KP_Divide>', 
-                        '<KP_Multiply>', '<KP_0>', '<BackSpace>', '<Delete>']
-            
-            for key in exit_keys:
-                try:
-                    sel_window.bind(key, lambda e: close_selection_dialog_perfect())
-                except:
-                    pass
-            
-            for i in range(min(len(items), 9)):
-                def make_direct_handler_perfect(idx):
-                    def direct_handler_perfect(event):
-                        if not dialog_closed['value']:
-                            dialog_closed['value'] = True
-                            logger.info(f"Direct selection: {item_type} index {idx}")
-                            
-                            if hasattr(self.system, 'speaker') and self.system.speaker:
-                                self.system.speaker.speak("success")
-                            
-                            if self.system.buzzer:
-                                self.system.buzzer.beep("click")
-                            try:
-                                sel_window.destroy()
-                            except:
-                                pass
-                            callback(idx)
-                            
-                            # 🎯 PERFECT ADMIN FOCUS RESTORATION
-                            def restore_admin_focus_from_direct():
-                                if self.admin_window and self.admin_window.winfo_exists():
-                                    self.admin_window.lift()
-                                    self.admin_window.attributes('-topmost', True)
-                                    self.admin_window.focus_force()
-                                    self.admin_window.focus_set()
-                                    self.admin_window.grab_set()
-                                    self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-                            
-                            self.admin_window.after(100, restore_admin_focus_from_direct)
-                            self.admin_window.after(300, restore_admin_focus_from_direct)
-                            self.admin_window.after(600, restore_admin_focus_from_direct)
-                            
-                            self._resume_focus_maintenance()
-                    return direct_handler_perfect
-                
-                sel_window.bind(str(i+1), make_direct_handler_perfect(i))
-                sel_window.bind(f'<KP_{i+1}>', make_direct_handler_perfect(i))
+        # Enhanced bindings - 1 handler <Key> + bảng dispatch theo keysym
+        keymap = {}
+        for keysym in ('Escape', 'period', 'KP_Decimal', 'KP_Divide',
+                       'KP_Multiply', 'KP_0', 'BackSpace', 'Delete'):
+            keymap[keysym] = close_selection_dialog_perfect
+        
+        keymap['Up'] = keymap['KP_Up'] = lambda: navigate_items(-1)
+        keymap['Down'] = keymap['KP_Down'] = lambda: navigate_items(1)
+        for keysym in ('Return', 'KP_Enter', 'KP_Add', 'space'):
+            keymap[keysym] = activate_selected
+        
+        for i in range(min(count, 9)):
+            keymap[str(i+1)] = keymap[f'KP_{i+1}'] = functools.partial(select_item_perfect, i)
+        
+        def on_key(event):
+            handler = keymap.get(event.keysym)
+            if handler is not None:
+                handler()
+                return "break"
         
-        setup_bindings_perfect()
+        sel_window.bind('<Key>', on_key)
+        
+        # Kích thước theo nội dung thực tế (số mục trong listbox)
+        sel_window.update_idletasks()
+        w = max(700, sel_window.winfo_reqwidth())
+        h = sel_window.winfo_reqheight()
+        sw, sh = _screen_size(sel_window)
+        sel_window.geometry(f'{w}x{h}+{(sw - w) // 2}+{(sh - h) // 2}')
+        
+        sel_window.deiconify()
+        sel_window.grab_set()
         
         # 🎯 PERFECT FOCUS FOR SELECTION DIALOG
-        sel_window.focus_set()
-        sel_window.after(50, lambda: sel_window.focus_force())
-        sel_window.after(150, lambda: sel_window.focus_set())
-        sel_window.after(300, lambda: sel_window.focus_force())
+        sel_window.lift()
+        sel_window.attributes('-topmost', True)
+        sel_window.focus_force()
+        # Lặp lại 1 lần ngay khi Tk rảnh (cửa sổ đã map) thay vì các timer cố định
+        sel_window.after_idle(sel_window.focus_force)
 
     def _do_remove_rfid_perfect(self, uid):
         """🎯 PERFECT: Remove RFID với perfect focus management"""
@@ -2515,119 +2771,123 @@ class ImprovedAdminGUI:
         
         self._pause_focus_maintenance()
         
-        if EnhancedMessageBox.ask_yesno(
+        EnhancedMessageBox.ask_yesno_async(
             self.admin_window, 
             "Xác nhận xóa thẻ RFID", 
             f"Xóa thẻ này?\n\nUID: {uid_display}",
+            lambda: self._finish_remove_rfid(uid),
+            self._end_admin_dialog,
             self.system.buzzer,
             getattr(self.system, 'speaker', None)
-        ):
-            if self.system.admin_data.remove_rfid(uid):
-                remaining_count = len(self.system.admin_data.get_rfid_uids())
-                
-                if hasattr(self.system, 'speaker') and self.system.speaker:
-                    self.system.speaker.speak("success", "Xóa thẻ từ thành công")
-                
-                EnhancedMessageBox.show_success(
-                    self.admin_window, 
-                    "Xóa thành công", 
-                    f" Đã xóa thẻ RFID thành công!\n\nCòn lại: {remaining_count} thẻ",
-                    self.system.buzzer,
-                    getattr(self.system, 'speaker', None)
-                )
-                
-                logger.info(f"  RFID removed: {uid}")
-                
-            else:
-                EnhancedMessageBox.show_error(
-                    self.admin_window, 
-                    "Lỗi", 
-                    "Không thể xóa thẻ khỏi hệ thống.",
-                    self.system.buzzer,
-                    getattr(self.system, 'speaker', None)
-                )
+        )
+    
+    def _finish_remove_rfid(self, uid):
+        """Xóa thẻ sau khi người dùng xác nhận"""
+        if self.system.admin_data.remove_rfid(uid):
+            remaining_count = self.system.admin_data.rfid_count
+            
+            if hasattr(self.system, 'speaker') and self.system.speaker:
+                self.system.speaker.speak("success", "Xóa thẻ từ thành công")
+            
+            EnhancedMessageBox.show_success(
+                self.admin_window, 
+                "Xóa thành công", 
+                f" Đã xóa thẻ RFID thành công!\n\nCòn lại: {remaining_count} thẻ",
+                self.system.buzzer,
+                getattr(self.system, 'speaker', None)
+            )
+            
+            logger.info(f"  RFID removed: {uid}")
+            
+        else:
+            EnhancedMessageBox.show_error(
+                self.admin_window, 
+                "Lỗi", 
+                "Không thể xóa thẻ khỏi hệ thống.",
+                self.system.buzzer,
+                getattr(self.system, 'speaker', None)
+            )
         
+        self._end_admin_dialog()
+    
+    def _end_admin_dialog(self):
+        """Dialog trong admin đã xong: bật lại focus maintenance + trả focus về admin"""
         self._resume_focus_maintenance()
         
-        # 🎯 PERFECT ADMIN FOCUS RESTORATION
-        def restore_admin_focus_after_remove():
-            if self.admin_window and self.admin_window.winfo_exists():
-                self.admin_window.lift()
-                self.admin_window.attributes('-topmost', True)
-                self.admin_window.focus_force()
-                self.admin_window.focus_set()
-                self.admin_window.grab_set()
-                self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-        
-        self.admin_window.after(100, restore_admin_focus_after_remove)
-        self.admin_window.after(300, restore_admin_focus_after_remove)
-        self.admin_window.after(600, restore_admin_focus_after_remove)
+        self._restore_admin_focus()
 
     def _do_remove_fingerprint_perfect(self, fp_id):
         """🎯 PERFECT: Remove fingerprint với perfect focus management"""
         self._pause_focus_maintenance()
         
-        if EnhancedMessageBox.ask_yesno(
+        EnhancedMessageBox.ask_yesno_async(
             self.admin_window, 
             "Xác nhận xóa vân tay", 
             f"Xóa vân tay ID {fp_id}?",
+            lambda: self._finish_remove_fingerprint(fp_id),
+            self._end_admin_dialog,
             self.system.buzzer,
             getattr(self.system, 'speaker', None)
-        ):
-            try:
-                self.system.fingerprint.deleteTemplate(fp_id)
-                
-                if self.system.admin_data.remove_fingerprint_id(fp_id):
-                    remaining_count = len(self.system.admin_data.get_fingerprint_ids())
-                    
-                    if hasattr(self.system, 'speaker') and self.system.speaker:
-                        self.system.speaker.speak("success", "Xóa vân tay thành công")
-                    
-                    EnhancedMessageBox.show_success(
-                        self.admin_window, 
-                        "Xóa thành công", 
-                        f" Đã xóa vân tay ID {fp_id} thành công!\n\nCòn lại: {remaining_count} vân tay",
-                        self.system.buzzer,
-                        getattr(self.system, 'speaker', None)
-                    )
-                    
-                    logger.info(f"  Fingerprint removed: ID {fp_id}")
-                    
-                else:
-                    EnhancedMessageBox.show_error(
-                        self.admin_window, 
-                        "Lỗi cơ sở dữ liệu", 
-                        "Không thể cập nhật cơ sở dữ liệu.",
-                        self.system.buzzer,
-                        getattr(self.system, 'speaker', None)
-                    )
-                    
-            except Exception as e:
-                EnhancedMessageBox.show_error(
-                    self.admin_window, 
-                    "Lỗi xóa vân tay", 
-                    f"Lỗi hệ thống: {str(e)}",
-                    self.system.buzzer,
-                    getattr(self.system, 'speaker', None)
-                )
-                
-                logger.error(f"❌ Fingerprint removal error for ID {fp_id}: {e}")
+        )
+    
+    def _finish_remove_fingerprint(self, fp_id):
+        """Xóa template trên thread sensor (không chặn Tk), kết quả về _on_fp_delete_ok/_err"""
+        self._fp_jobs.put((
+            self._delete_template, (fp_id,),
+            functools.partial(self._on_fp_delete_ok, fp_id),
+            functools.partial(self._on_fp_delete_err, fp_id)
+        ))
+    
+    def _delete_template(self, fp_id):
+        """Job trên thread sensor: giữ quyền cảm biến trong lúc xóa template"""
+        user_id = f"admin_delete_{fp_id}"
+        if not self.fp_manager.acquire_sensor(user_id, timeout=10):
+            raise RuntimeError("Cảm biến vân tay đang bận")
+        try:
+            return self.system.fingerprint.deleteTemplate(fp_id)
+        finally:
+            self.fp_manager.release_sensor(user_id)
+    
+    def _on_fp_delete_ok(self, fp_id, _result=None):
+        if self.system.admin_data.remove_fingerprint_id(fp_id):
+            remaining_count = self.system.admin_data.fp_count
+            
+            if hasattr(self.system, 'speaker') and self.system.speaker:
+                self.system.speaker.speak("success", "Xóa vân tay thành công")
+            
+            EnhancedMessageBox.show_success(
+                self.admin_window, 
+                "Xóa thành công", 
+                f" Đã xóa vân tay ID {fp_id} thành công!\n\nCòn lại: {remaining_count} vân tay",
+                self.system.buzzer,
+                getattr(self.system, 'speaker', None)
+            )
+            
+            logger.info(f"  Fingerprint removed: ID {fp_id}")
+            
+        else:
+            EnhancedMessageBox.show_error(
+                self.admin_window, 
+                "Lỗi cơ sở dữ liệu", 
+                "Không thể cập nhật cơ sở dữ liệu.",
+                self.system.buzzer,
+                getattr(self.system, 'speaker', None)
+            )
         
-        self._resume_focus_maintenance()
+        self._end_admin_dialog()
+    
+    def _on_fp_delete_err(self, fp_id, e):
+        EnhancedMessageBox.show_error(
+            self.admin_window, 
+            "Lỗi xóa vân tay", 
+            f"Lỗi hệ thống: {str(e)}",
+            self.system.buzzer,
+            getattr(self.system, 'speaker', None)
+        )
         
-        # 🎯 PERFECT ADMIN FOCUS RESTORATION
-        def restore_admin_focus_after_remove():
-            if self.admin_window and self.admin_window.winfo_exists():
-                self.admin_window.lift()
-                self.admin_window.attributes('-topmost', True)
-                self.admin_window.focus_force()
-                self.admin_window.focus_set()
-                self.admin_window.grab_set()
-                self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
+        logger.error(f"❌ Fingerprint removal error for ID {fp_id}: {e}")
         
-        self.admin_window.after(100, restore_admin_focus_after_remove)
-        self.admin_window.after(300, restore_admin_focus_after_remove)
-        self.admin_window.after(600, restore_admin_focus_after_remove)
+        self._end_admin_dialog()
 
     def _toggle_authentication_mode(self):
         """🎯 PERFECT: Authentication mode toggle với perfect focus"""
@@ -2691,20 +2951,8 @@ class ImprovedAdminGUI:
             
             self._resume_focus_maintenance()
             
-            # 🎯 PERFECT ADMIN FOCUS RESTORATION
-            def restore_admin_focus_after_mode():
-                if self.admin_window and self.admin_window.winfo_exists():
-                    self.admin_window.lift()
-                    self.admin_window.attributes('-topmost', True)
-                    self.admin_window.focus_force()
-                    self.admin_window.focus_set()
-                    self.admin_window.grab_set()
-                    self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-            
             if self.admin_window and self.admin_window.winfo_exists():
-                self.admin_window.after(100, restore_admin_focus_after_mode)
-                self.admin_window.after(300, restore_admin_focus_after_mode)
-                self.admin_window.after(600, restore_admin_focus_after_mode)
+                self._restore_admin_focus()
                     
         except Exception as e:
             self._pause_focus_maintenance()
@@ -2724,36 +2972,22 @@ class ImprovedAdminGUI:
         
         self._pause_focus_maintenance()
         
-        if EnhancedMessageBox.ask_yesno(
+        EnhancedMessageBox.ask_yesno_async(
             self.admin_window, 
             "Thoát quản trị", 
             "Thoát chế độ quản trị ?\n\nHệ thống sẽ quay về chế độ xác thực bình thường.",
+            self._close_admin_properly,
+            self._end_admin_dialog,
             self.system.buzzer,
             getattr(self.system, 'speaker', None)
-        ):
-            self._close_admin_properly()
-        else:
-            self._resume_focus_maintenance()
-            
-            # 🎯 PERFECT ADMIN FOCUS RESTORATION
-            def restore_admin_focus_after_cancel():
-                if self.admin_window and self.admin_window.winfo_exists():
-                    self.admin_window.lift()
-                    self.admin_window.attributes('-topmost', True)
-                    self.admin_window.focus_force()
-                    self.admin_window.focus_set()
-                    self.admin_window.grab_set()
-                    self.admin_window.after(100, lambda: self.admin_window.attributes('-topmost', False))
-            
-            self.admin_window.after(100, restore_admin_focus_after_cancel)
-            self.admin_window.after(300, restore_admin_focus_after_cancel)
-            self.admin_window.after(600, restore_admin_focus_after_cancel)
+        )
     
     def _close_admin_properly(self):
         """🛡️ CRITICAL: Properly close admin với background auth resume"""
         logger.info("  Admin panel closing properly with background auth resume")
         
         self.focus_maintenance_active = False
+        self._cancel_rfid_scan()
         
         if not self.fp_manager.is_available():
             self.fp_manager.force_release()
@@ -10,6 +10,7 @@ import pickle
 import os
 import logging
 import time
+import stat
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 
@@ -38,10 +39,18 @@ class ImprovedFaceRecognition:
                  models_path: str = "/home/khoi/Desktop/KHOI_LUANAN/models",
                  face_data_path: str = "/home/khoi/Desktop/KHOI_LUANAN/face_data",
                  confidence_threshold: float = 0.5,
-                 recognition_threshold: float = 100.0):
+                 recognition_threshold: float = 100.0,
+                 cache_path: Optional[str] = None):
         
         self.models_path = models_path
         self.face_data_path = face_data_path
+        # Cache model LBPH riêng cho user: $XDG_RUNTIME_DIR (tmpfs, 0700) hoặc cạnh face_data
+        # (không dùng /dev/shm chung - user khác có thể cài model giả)
+        if cache_path is None:
+            runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+            cache_path = (os.path.join(runtime_dir, "face_cache") if runtime_dir
+                          else os.path.join(face_data_path, ".model_cache"))
+        self.cache_path = cache_path
         self.confidence_threshold = confidence_threshold
         self.recognition_threshold = recognition_threshold
         
@@ -54,6 +63,10 @@ class ImprovedFaceRecognition:
         self.face_recognizer = None
         self.face_cascade = None  # Backup method
         self.known_faces_db = {}
+        # Đếm sẵn, cập nhật khi database thay đổi (version tăng mỗi lần ghi)
+        self.version = 0
+        self.total_images = 0
+        self._info_cache = None
         
         # Performance settings
         self.input_size = (300, 300)
@@ -122,9 +135,11 @@ class ImprovedFaceRecognition:
                 with open(db_file, 'rb') as f:
                     self.known_faces_db = pickle.load(f)
                 
-                # Train recognizer nếu có dữ liệu
+                # Dùng model cache nếu còn khớp database, nếu không thì train lại
                 if self.known_faces_db:
-                    self._train_recognizer()
+                    if not self._load_cached_model(db_file):
+                        self._train_recognizer()
+                        self._write_model_cache(db_file)
                     logger.info(f"✅ Loaded {len(self.known_faces_db)} people from database")
                 else:
                     logger.info("ℹ️ Database trống, chưa có ai được đăng ký")
@@ -135,6 +150,82 @@ class ImprovedFaceRecognition:
         except Exception as e:
             logger.error(f"❌ Lỗi load database: {e}")
             self.known_faces_db = {}
+        
+        self._db_changed()
+    
+    def _db_changed(self):
+        """Gọi sau mỗi lần sửa known_faces_db: cập nhật số đếm, bỏ cache thông tin"""
+        self.version += 1
+        self.total_images = sum(len(data['faces']) for data in self.known_faces_db.values())
+        self._info_cache = None
+    
+    def _model_cache_file(self, db_file: str) -> Optional[str]:
+        """Đường dẫn file cache LBPH gắn với mtime/size của database và ngưỡng nhận diện"""
+        try:
+            st = os.stat(db_file)
+            return os.path.join(self.cache_path,
+                                f"lbph_{st.st_mtime_ns}_{st.st_size}_{self.recognition_threshold:g}.yml")
+        except OSError:
+            return None
+    
+    @staticmethod
+    def _owned_private(st) -> bool:
+        """Thuộc user hiện tại và group/other không ghi được"""
+        return st.st_uid == os.getuid() and not (st.st_mode & (stat.S_IWGRP | stat.S_IWOTH))
+    
+    def _cache_dir_ok(self, create: bool = False) -> bool:
+        """Thư mục cache phải là thư mục thật (không symlink), của user hiện tại, mode 0700"""
+        try:
+            if create:
+                os.makedirs(self.cache_path, mode=0o700, exist_ok=True)
+            st = os.lstat(self.cache_path)
+        except OSError:
+            return False
+        
+        if (not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid()
+                or st.st_mode & (stat.S_IRWXG | stat.S_IRWXO)):
+            logger.warning(f"⚠️ Bỏ qua model cache: {self.cache_path} không phải thư mục riêng 0700 của user")
+            return False
+        return True
+    
+    def _load_cached_model(self, db_file: str) -> bool:
+        """Đọc model LBPH đã train từ cache (tmpfs) để bỏ qua bước train lại"""
+        cache_file = self._model_cache_file(db_file)
+        if not cache_file or not self._cache_dir_ok():
+            return False
+        try:
+            st = os.lstat(cache_file)
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or not self._owned_private(st):
+            logger.warning(f"⚠️ Bỏ qua model cache không tin cậy: {cache_file}")
+            return False
+        try:
+            self.face_recognizer.read(cache_file)
+            # read() khôi phục cả threshold lưu trong yml - áp lại ngưỡng cấu hình hiện tại
+            self.face_recognizer.setThreshold(self.recognition_threshold)
+            logger.info(f"✅ Loaded LBPH model từ cache: {cache_file}")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Không đọc được model cache: {e}")
+            return False
+    
+    def _write_model_cache(self, db_file: str):
+        """Ghi model LBPH đã train vào cache, xoá các bản cache cũ"""
+        cache_file = self._model_cache_file(db_file)
+        if not cache_file or not self._cache_dir_ok(create=True):
+            return
+        try:
+            self._clear_model_cache()
+            self.face_recognizer.write(cache_file)
+        except Exception as e:
+            logger.warning(f"⚠️ Không ghi được model cache: {e}")
+    
+    def _clear_model_cache(self):
+        """Xoá mọi file lbph_*.yml trong thư mục cache riêng (đã kiểm tra quyền)"""
+        for old in os.listdir(self.cache_path):
+            if old.startswith("lbph_") and old.endswith(".yml"):
+                os.remove(os.path.join(self.cache_path, old))
     
     def _train_recognizer(self):
         """Train lại face recognizer với dữ liệu hiện có"""
@@ -420,6 +511,8 @@ class ImprovedFaceRecognition:
                 'added_time': time.time()
             }
             
+            self._db_changed()
+            
             # Retrain recognizer
             self._train_recognizer()
             
@@ -439,6 +532,14 @@ class ImprovedFaceRecognition:
             db_file = os.path.join(self.face_data_path, "face_database.pkl")
             with open(db_file, 'wb') as f:
                 pickle.dump(self.known_faces_db, f)
+            if self.known_faces_db:
+                self._write_model_cache(db_file)
+            elif self._cache_dir_ok():
+                # Database trống: bỏ model cache cũ
+                try:
+                    self._clear_model_cache()
+                except OSError as e:
+                    logger.warning(f"⚠️ Không xoá được model cache: {e}")
             logger.info("✅ Database đã được lưu")
         except Exception as e:
             logger.error(f"❌ Lỗi lưu database: {e}")
@@ -489,7 +590,18 @@ class ImprovedFaceRecognition:
             return []
     
     def get_database_info(self) -> Dict:
-        """Lấy thông tin database"""
+        """Lấy thông tin database (cache tới lần thay đổi kế tiếp, trả về bản sao)"""
+        if self._info_cache is None:
+            self._info_cache = self._build_database_info()
+        
+        # Bản sao để caller sửa kết quả không làm hỏng cache dùng chung
+        info = self._info_cache
+        return {
+            'total_people': info['total_people'],
+            'people': {name: dict(person) for name, person in info['people'].items()}
+        }
+    
+    def _build_database_info(self) -> Dict:
         info = {
             'total_people': len(self.known_faces_db),
             'people': {}
@@ -508,6 +620,7 @@ class ImprovedFaceRecognition:
         try:
             if name in self.known_faces_db:
                 del self.known_faces_db[name]
+                self._db_changed()
                 self._train_recognizer()
                 self._save_database()
                 logger.info(f"✅ Đã xóa {name} khỏi database")